@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+import numpy as np
+import polars as pl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import nebular_xplorer as nx
+from nebular_xplorer.log import RssSampler, _rss
+from benchmarks import synthetic
+
+stages = ['generate', 'prepare', 'getReturnTable', 'metrics', 'getPortStat', 'dd_details', 'report']
+scales = {
+    'small': dict(n_codes=500, n_days=250, n_factors=1),
+    'medium': dict(n_codes=3000, n_days=1250, n_factors=10),
+    'large': dict(n_codes=6000, n_days=5000, n_factors=50),
+}
+
+
+def measure(func, repeat=1, alloc=True):
+    times, peaks, growth = [], [], []
+    result = None
+    for _ in range(repeat):
+        sampler = RssSampler()
+        start_rss = sampler.peak
+        sampler.start()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+        sampler.stop()
+        peaks.append(max(sampler.peak, _rss()))
+        growth.append(peaks[-1] - start_rss)
+    stat = {'time': min(times), 'times': times, 'peak_rss': max(peaks), 'rss_growth': max(growth)}
+    if alloc:
+        tracemalloc.start()
+        func()
+        current, peak = tracemalloc.get_traced_memory()
+        stat['alloc_peak'], stat['alloc_net'] = peak, current
+        stat['alloc_blocks'] = sum(x.count for x in tracemalloc.take_snapshot().statistics('filename'))
+        tracemalloc.stop()
+    return result, stat
+
+
+def _rows(data):
+    if hasattr(data, 'shape'):
+        return int(data.shape[0])
+    return None
+
+
+def run(n_codes=500, n_days=250, n_factors=1, n_benchmarks=1, seed=0, repeat=3, alloc=True,
+        only=None, data_dir=None, chunk_days=None, max_workers=None):
+    nx.cache.disable()
+    only = stages if only is None else only
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix='nx-bench-')
+    factor_name, target_name = 'factor1', '1d_forward_return'
+
+    def stage(name, func, stage_repeat=repeat):
+        if name not in only:
+            return func()
+        print(f"{name:>16} ...", end='', flush=True, file=sys.stderr)
+        result, stat = measure(func, stage_repeat, alloc)
+        stat['rows'] = _rows(result)
+        results[name] = stat
+        print(f" {stat['time']:.3f}s, rss +{stat['rss_growth'] / 2**20:.1f}MB", file=sys.stderr)
+        return result
+
+    if data_dir is None:
+        factors, targets, benchmarks = stage('generate', lambda: synthetic.generate(
+            n_codes, n_days, n_factors, n_benchmarks, seed=seed), 1)
+    else:
+        factors, targets, benchmarks = stage('generate', lambda: synthetic.write(
+            data_dir, n_codes, n_days, n_factors, n_benchmarks, seed=seed), 1)
+        benchmarks = pl.read_parquet(benchmarks)
+    if chunk_days is None:
+        full_data = stage('prepare', lambda: nx.utils.prepare(factors, targets))
+    else:
+        sink = os.path.join(work_dir, 'full_data.parquet')
+        full_data = stage('prepare', lambda: nx.utils.prepare(
+            factors, targets, sink=sink, chunk_days=chunk_days)).collect()
+    return_table = stage('getReturnTable', lambda: nx.utils.getReturnTable(
+        full_data, factor_name, target_name, benchmarks))
+    factor_metrics = stage('metrics', lambda: nx.stat.metrics(full_data, factor_name))
+    port_stat = stage('getPortStat', lambda: nx.stat.getPortStat(return_table))
+    stage('dd_details', lambda: nx.stat.dd_details(return_table))
+
+    def report():
+        html = nx.report.HtmlTpl()
+        html.addTable(port_stat, '{{table1}}')
+        html.addTable(nx.stat.summaryMetrics(factor_metrics), '{{table2}}')
+        html.addTable(nx.stat.worstdd(return_table), '{{table3}}')
+        groups = return_table[[x for x in return_table.columns if x.startswith('G')]]
+        html.addFigures({
+            '{{fig1}}': (nx.plots.snapshot, (return_table,)),
+            '{{fig2}}': (nx.plots.groupNav, (groups,)),
+            '{{fig3}}': (nx.plots.ic, (factor_metrics[[f'IC_{target_name}']],)),
+        }, dpi=100, max_workers=max_workers)
+        file = os.path.join(work_dir, 'report.html')
+        html.save(file)
+        return file
+
+    stage('report', report, 1)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'polars': pl.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def compare(results, baseline, tolerance=0.2, min_time=0.05):
+    regressions = []
+    rows = []
+    for name, stat in results['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if base is None:
+            continue
+        for metric in ['time', 'peak_rss', 'alloc_peak']:
+            if metric not in stat or metric not in base or not base[metric]:
+                continue
+            ratio = stat[metric] / base[metric]
+            rows.append((name, metric, base[metric], stat[metric], ratio))
+            floor = min_time if metric == 'time' else 2**20
+            if ratio > 1 + tolerance and stat[metric] - base[metric] > floor:
+                regressions.append((name, metric, base[metric], stat[metric], ratio))
+    return rows, regressions
+
+
+def _format(metric, value):
+    return f"{value:.3f}s" if metric == 'time' else f"{value / 2**20:.1f}MB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='NebulaXplorer benchmarks on synthetic market data.')
+    parser.add_argument('--scale', choices=list(scales), default='small')
+    parser.add_argument('--codes', type=int)
+    parser.add_argument('--days', type=int)
+    parser.add_argument('--factors', type=int)
+    parser.add_argument('--benchmarks', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', help=f"comma separated subset of {','.join(stages)}")
+    parser.add_argument('--no-alloc', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--data-dir', help='write the synthetic data as parquet chunks and prepare from disk')
+    parser.add_argument('--chunk-days', type=int, help='streaming prepare, chunk_days at a time')
+    parser.add_argument('--max-workers', type=int)
+    parser.add_argument('--output', help='results json')
+    parser.add_argument('--baseline', help='baseline json to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    config = dict(scales[args.scale])
+    for key, value in [('n_codes', args.codes), ('n_days', args.days), ('n_factors', args.factors)]:
+        if value is not None:
+            config[key] = value
+    config.update(n_benchmarks=args.benchmarks, seed=args.seed)
+    results = {
+        'config': {**config, 'repeat': args.repeat, 'chunk_days': args.chunk_days},
+        'environment': environment(),
+        'stages': run(**config, repeat=args.repeat, alloc=not args.no_alloc,
+                      only=args.stages.split(',') if args.stages else None,
+                      data_dir=args.data_dir, chunk_days=args.chunk_days, max_workers=args.max_workers),
+    }
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results',
+        f"{config['n_codes']}x{config['n_days']}x{config['n_factors']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"results saved to {output}", file=sys.stderr)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if {k: v for k, v in baseline.get('config', {}).items() if k != 'repeat'} != \
+            {k: v for k, v in results['config'].items() if k != 'repeat'}:
+        print("warning: baseline was recorded with a different config", file=sys.stderr)
+    rows, regressions = compare(results, baseline, args.tolerance)
+    for name, metric, old, new, ratio in rows:
+        flag = ' REGRESSION' if (name, metric, old, new, ratio) in regressions else ''
+        print(f"{name:>16} {metric:>10} {_format(metric, old):>10} -> {_format(metric, new):>10} ({ratio:5.2f}x){flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
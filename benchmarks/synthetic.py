@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import polars as pl
+
+from nebular_xplorer.calendar import TradeCalendar
+
+horizons = [1, 5]
+
+
+def _dayReturns(seed, day, n_codes, market):
+    rng = np.random.default_rng([seed, day, 0])
+    return market[day] + rng.standard_normal(n_codes) * 0.02
+
+
+def _marketReturns(seed, n_days):
+    return np.random.default_rng([seed, 0, 1]).standard_normal(n_days) * 0.01
+
+
+def generate(n_codes=500, n_days=250, n_factors=1, n_benchmarks=1, start_date=20000103,
+             missing=0.01, seed=0, days=None):
+    dates = TradeCalendar.weekdays(start_date).dates
+    if len(dates) < n_days + max(horizons):
+        raise ValueError(f"Calendar from {start_date} is too short for {n_days} days.")
+    market = _marketReturns(seed, n_days + max(horizons))
+    days = range(n_days) if days is None else days
+    codes = np.arange(1, n_codes + 1, dtype=np.int64)
+    cache = {}
+
+    def returns(day):
+        if day not in cache:
+            cache[day] = _dayReturns(seed, day, n_codes, market)
+        return cache[day]
+
+    signal = np.linspace(0.02, 0.2, n_factors) * np.where(np.arange(n_factors) % 2, -1, 1)
+    factor_names = [f'factor{x+1}' for x in range(n_factors)]
+    factors, targets = [], []
+    for day in days:
+        rng = np.random.default_rng([seed, day, 2])
+        future = np.cumprod(1 + np.stack([returns(day + x) for x in range(1, max(horizons) + 1)]), axis=0) - 1
+        score = (future[0] - future[0].mean()) / future[0].std()
+        values = signal[:, None] * score + rng.standard_normal((n_factors, n_codes))
+        values[rng.random((n_factors, n_codes)) < missing] = np.nan
+        factors.append(pl.DataFrame({
+            'date': np.full(n_factors * n_codes, dates[day], dtype=np.int64),
+            'code': np.tile(codes, n_factors),
+            'factor_value': values.reshape(-1),
+            'factor_name': np.repeat(factor_names, n_codes),
+        }))
+        targets.append(pl.DataFrame({
+            'date': np.full(len(horizons) * n_codes, dates[day], dtype=np.int64),
+            'code': np.tile(codes, len(horizons)),
+            'target_value': np.concatenate([future[x - 1] for x in horizons]),
+            'target_name': np.repeat([f'{x}d_forward_return' for x in horizons], n_codes),
+        }))
+        for x in [x for x in cache if x <= day]:
+            del cache[x]
+    rng = np.random.default_rng([seed, 0, 3])
+    benchmarks = pl.DataFrame({
+        'date': np.tile(dates[:n_days], n_benchmarks).astype(np.int64),
+        'name': np.repeat([f'bm{x+1}' for x in range(n_benchmarks)], n_days),
+        'return_value': np.tile(market[:n_days], n_benchmarks) + rng.standard_normal(n_days * n_benchmarks) * 0.002,
+    })
+    factors = pl.concat(factors).with_columns(pl.col('factor_value').fill_nan(None))
+    return factors, pl.concat(targets), benchmarks
+
+
+def write(directory, n_codes=500, n_days=250, n_factors=1, n_benchmarks=1, start_date=20000103,
+          missing=0.01, seed=0, chunk_days=250):
+    for name in ['factors', 'targets']:
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+    for start in range(0, n_days, chunk_days):
+        factors, targets, benchmarks = generate(
+            n_codes, n_days, n_factors, n_benchmarks, start_date, missing, seed,
+            days=range(start, min(start + chunk_days, n_days)))
+        factors.write_parquet(os.path.join(directory, 'factors', f'part-{start:06d}.parquet'))
+        targets.write_parquet(os.path.join(directory, 'targets', f'part-{start:06d}.parquet'))
+    benchmarks.write_parquet(os.path.join(directory, 'benchmarks.parquet'))
+    return (os.path.join(directory, 'factors', '*.parquet'),
+            os.path.join(directory, 'targets', '*.parquet'),
+            os.path.join(directory, 'benchmarks.parquet'))
@@ -1,4 +1,15 @@
-from . import utils
-from . import stat
-from . import plots
-from . import report
\ No newline at end of file
+import importlib
+
+__all__ = ['cache', 'utils', 'calendar', 'stat', 'rolling', 'tracker', 'preprocess', 'plots', 'report', 'log', 'downsample', 'batch']
+
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,253 @@
+import os
+import sys
+import glob
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import polars as pl
+
+from .utils import prepare, getReturnTable, getTurnover, netReturnTable, check_full_data, _scan, _is_ipc, factorSuffix, targetSuffix, benchmarkSuffix
+from .stat import metrics, summaryMetrics, getPortStat, portStats, worstdd
+from .report import HtmlTpl, figureBuffer, _html_table, _headless, _context
+from .log import Logger, span
+from . import plots
+
+summaryColumns = ['file', 'factor', 'target', 'IC', 'rankIC', 'IR', 'rankIR', 'ARR', 'Sharpe', 'MaxDD',
+                  'Turnover', 'Net ARR', 'Net Sharpe', 'report']
+_shared = {}
+
+
+def factorFiles(source):
+    source = str(source)
+    if os.path.isdir(source):
+        files = [x for x in glob.glob(os.path.join(source, '*')) if x.endswith('.parquet') or _is_ipc(x)]
+    else:
+        files = glob.glob(source)
+    return sorted(files)
+
+
+def _mtime(source):
+    if source is None:
+        return 0.0
+    files = glob.glob(str(source))
+    if not files:
+        raise FileNotFoundError(f"No files match {source}.")
+    return max(os.path.getmtime(x) for x in files)
+
+
+def shareFrame(source, file):
+    if os.path.exists(file) and os.path.getmtime(file) >= _mtime(source):
+        return file
+    with span('batch.share', file=os.path.basename(file)) as s:
+        data = s.record(_scan(source).collect())
+        temp = f"{file}.{os.getpid()}.tmp"
+        data.write_ipc(temp, compression='uncompressed')
+        os.replace(temp, file)
+    return file
+
+
+def loadShared(file):
+    import pyarrow as pa
+    table = pa.ipc.open_file(pa.memory_map(str(file), 'r')).read_all()
+    return pl.from_arrow(table, rechunk=False)
+
+
+def _loadInputs(targets_file, benchmarks_file):
+    _shared['targets'] = loadShared(targets_file)
+    _shared['benchmarks'] = None if benchmarks_file is None else loadShared(benchmarks_file)
+
+
+def _initWorker(targets_file, benchmarks_file):
+    _headless()
+    _loadInputs(targets_file, benchmarks_file)
+
+
+def factorReport(full_data, factor_name, target_name=None, benchmarks=None, n_groups=10, n_top=[200, 1000], dpi=150,
+                 cost=0.0015):
+    factor_name = factor_name.replace(factorSuffix, '')
+    if target_name is None:
+        target_name = sorted(check_full_data(full_data)[1])[0]
+    target_name = target_name.replace(targetSuffix, '')
+    return_table = getReturnTable(full_data, factor_name, target_name, benchmarks, n_groups, n_top)
+    turnover = getTurnover(full_data, factor_name, n_groups, n_top)
+    net_table = netReturnTable(return_table[turnover.columns], turnover, cost)
+    factor_metrics = metrics(full_data, factor_name)
+    ic_data = factor_metrics[[f'IC_{target_name}']]
+    groups = [x for x in return_table.columns if x.startswith('G')]
+    max_group, min_group = groups[-1], groups[0]
+    benchmark_names = [x for x in return_table.columns if x.endswith(benchmarkSuffix)]
+
+    html = HtmlTpl()
+    html.addElement('NebulaXplorer.', '{{author}}')
+    html.addElement(f'{factor_name} Report', '{{title}}')
+    html.addFigure(lambda: figureBuffer(plots.groupNav(return_table[groups]), dpi=dpi), '{{fig1}}')
+    html.addFigure(lambda: figureBuffer(plots.returnHeatMap(return_table), dpi=dpi), '{{fig2}}')
+    html.addFigure(lambda: figureBuffer(plots.ic(ic_data), dpi=dpi), '{{fig3}}')
+    html.addFigure(lambda: figureBuffer(plots.icHeatMap(ic_data), dpi=dpi), '{{fig4}}')
+    html.addFigure(lambda: figureBuffer(plots.ddNav(return_table[[min_group]]), dpi=dpi), '{{fig5}}')
+    html.addFigure(lambda: figureBuffer(plots.turnover(turnover[[max_group, min_group]]), dpi=dpi), '{{fig6}}')
+    return_stats = getPortStat(return_table, turnover=turnover)
+    net_stats = getPortStat(net_table)[['ARR_SI', 'Sharpe']].add_prefix('Net ')
+    return_stats = return_stats.join(net_stats).T[[max_group, min_group] + benchmark_names]
+    return_stats.columns = ['Max Group', 'Min Group', *[x.replace(benchmarkSuffix, '') for x in benchmark_names]]
+    html.addTable(return_stats, '{{table1}}')
+    ic_summary = summaryMetrics(factor_metrics)
+    html.addTable(ic_summary.T, '{{table2}}')
+    html.addTable(worstdd(return_table[[min_group]], 5), '{{table3}}', showindex=False)
+
+    spread = (return_table[max_group] - return_table[min_group]).to_frame('spread')
+    spread_turnover = (turnover[max_group] + turnover[min_group]).to_frame('spread')
+    net_spread = portStats(netReturnTable(spread, spread_turnover, cost)).loc['spread']
+    spread = portStats(spread).loc['spread']
+    summary = {
+        'factor': factor_name,
+        'target': target_name,
+        **{x: float(ic_summary.loc[target_name, x]) for x in ['IC', 'rankIC', 'IR', 'rankIR']},
+        'ARR': float(spread['ARR_SI']),
+        'Sharpe': float(spread['Sharpe']),
+        'MaxDD': float(spread['MaxDD']),
+        'Turnover': float(spread_turnover['spread'].mean()),
+        'Net ARR': float(net_spread['ARR_SI']),
+        'Net Sharpe': float(net_spread['Sharpe']),
+    }
+    return html, summary
+
+
+def _manifest(output_dir, file):
+    name = os.path.basename(file)
+    return os.path.join(output_dir, name), os.path.join(output_dir, name, 'summary.json')
+
+
+def isUpToDate(file, output_dir, inputs_mtime=0.0, params=None):
+    _, manifest = _manifest(output_dir, file)
+    if not os.path.exists(manifest):
+        return False
+    if os.path.getmtime(manifest) < max(os.path.getmtime(file), inputs_mtime):
+        return False
+    with open(manifest) as f:
+        manifest = json.load(f)
+    if params is not None and manifest['params'] != json.loads(json.dumps(params)):
+        return False
+    return all(os.path.exists(os.path.join(output_dir, x['report'])) for x in manifest['rows'])
+
+
+def runFile(file, output_dir, target_name=None, n_groups=10, n_top=[200, 1000], dpi=150, cost=0.0015):
+    report_dir, manifest = _manifest(output_dir, file)
+    os.makedirs(report_dir, exist_ok=True)
+    with span('batch.file', file=os.path.basename(file)):
+        full_data = prepare(_scan(file).collect(), _shared['targets'])
+        rows = []
+        for factor_name in check_full_data(full_data)[0]:
+            html, summary = factorReport(full_data, factor_name, target_name, _shared['benchmarks'],
+                                         n_groups, n_top, dpi, cost)
+            report = os.path.join(os.path.basename(report_dir), f"{summary['factor']}.html")
+            html.save(os.path.join(output_dir, report))
+            rows.append({'file': file, **summary, 'report': report})
+    temp = f"{manifest}.{os.getpid()}.tmp"
+    with open(temp, 'w') as f:
+        json.dump({'params': dict(target_name=target_name, n_groups=n_groups, n_top=n_top, dpi=dpi, cost=cost),
+                   'rows': rows}, f, indent=2)
+    os.replace(temp, manifest)
+    return rows
+
+
+def _loadManifest(file, output_dir):
+    with open(_manifest(output_dir, file)[1]) as f:
+        return json.load(f)['rows']
+
+
+def summaryTable(rows):
+    table = pd.DataFrame(rows, columns=summaryColumns)
+    table['IR Rank'] = table['IR'].rank(ascending=False, method='min')
+    table['Sharpe Rank'] = table['Sharpe'].rank(ascending=False, method='min')
+    return table.sort_values(['IR', 'Sharpe'], ascending=False, ignore_index=True)
+
+
+def saveSummary(table, output_dir):
+    table.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    html = table.drop(columns=['file'])
+    html['report'] = [f'<a href="{x}">{x}</a>' for x in html['report']]
+    with open(os.path.join(output_dir, 'summary.html'), 'w') as f:
+        f.write(_html_table(html, showindex=False, floatfmt='.4f', tablefmt='unsafehtml'))
+
+
+def run(factors, targets, output_dir, benchmarks=None, target_name=None, n_groups=10, n_top=[200, 1000],
+        max_workers=None, force=False, dpi=150, cost=0.0015):
+    logger = Logger('Batch(nx)')
+    files = factorFiles(factors)
+    if not files:
+        raise ValueError(f"No factor files found in {factors}.")
+    names = pd.Series([os.path.basename(x) for x in files])
+    if names.duplicated().any():
+        raise ValueError(f"Factor files share a file name: {sorted(set(names[names.duplicated()]))}.")
+    shared_dir = os.path.join(output_dir, '.shared')
+    os.makedirs(shared_dir, exist_ok=True)
+    targets_file = shareFrame(targets, os.path.join(shared_dir, 'targets.arrow'))
+    benchmarks_file = None if benchmarks is None else shareFrame(
+        benchmarks, os.path.join(shared_dir, 'benchmarks.arrow'))
+    inputs_mtime = max(_mtime(targets), _mtime(benchmarks))
+    params = dict(target_name=target_name, n_groups=n_groups, n_top=list(n_top), dpi=dpi, cost=cost)
+    pending = files if force else [x for x in files if not isUpToDate(x, output_dir, inputs_mtime, params)]
+    logger.info(f"{len(files) - len(pending)} of {len(files)} factor files up to date, {len(pending)} to run.")
+
+    failed = []
+    max_workers = max_workers or min(len(pending), os.cpu_count() or 1)
+    if pending and max_workers == 1:
+        previous = dict(_shared)
+        _loadInputs(targets_file, benchmarks_file)
+        try:
+            for file in pending:
+                try:
+                    runFile(file, output_dir, **params)
+                except Exception as e:
+                    logger.error(f"{file} failed: {e!r}")
+                    failed.append(file)
+        finally:
+            _shared.clear()
+            _shared.update(previous)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=_context(), initializer=_initWorker,
+                                 initargs=(targets_file, benchmarks_file)) as pool:
+            futures = {pool.submit(runFile, file, output_dir, **params): file for file in pending}
+            for i, future in enumerate(as_completed(futures)):
+                file = futures[future]
+                try:
+                    future.result()
+                    logger.info(f"[{i + 1}/{len(pending)}] {file} done.")
+                except Exception as e:
+                    logger.error(f"{file} failed: {e!r}")
+                    failed.append(file)
+
+    rows = [row for file in files if file not in failed for row in _loadManifest(file, output_dir)]
+    table = summaryTable(rows)
+    saveSummary(table, output_dir)
+    return table, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='NebulaXplorer factor reports for a batch of factor files.')
+    parser.add_argument('factors', help='directory or glob of factor parquet/ipc files')
+    parser.add_argument('--targets', required=True, help='targets file or glob')
+    parser.add_argument('--benchmarks', help='benchmarks file')
+    parser.add_argument('--output', default='reports')
+    parser.add_argument('--target-name', help='target used for the return tables, default the first one')
+    parser.add_argument('--n-groups', type=int, default=10)
+    parser.add_argument('--n-top', default='200,1000', help='comma separated top sizes')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--cost', type=float, default=0.0015, help='trading cost per unit of one-way turnover')
+    parser.add_argument('--force', action='store_true', help='rerun up-to-date factor files')
+    args = parser.parse_args(argv)
+
+    table, failed = run(args.factors, args.targets, args.output, args.benchmarks, args.target_name,
+                        args.n_groups, [int(x) for x in args.n_top.split(',')], args.workers, args.force, args.dpi,
+                        args.cost)
+    print(table.drop(columns=['file']).to_string(index=False))
+    print(f"summary saved to {os.path.join(args.output, 'summary.csv')}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
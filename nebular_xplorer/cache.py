@@ -0,0 +1,169 @@
+import os
+import sys
+import glob
+import json
+import hashlib
+from contextlib import contextmanager
+import numpy as np
+import polars as pl
+
+cacheEnv = 'NX_CACHE_DIR'
+cacheSizeEnv = 'NX_CACHE_BYTES'
+cacheVersion = 2
+_cache = None
+
+
+class Cache:
+    def __init__(self, cache_dir, max_bytes=10 * 2**30):
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = int(max_bytes)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, name, *frames, **params):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{name}|{cacheVersion}|{pl.__version__}".encode())
+        for frame in frames:
+            frame = fingerprint(frame)
+            if frame is None:
+                return None
+            digest.update(frame.encode())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return f"{name}-{digest.hexdigest()}"
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.arrow")
+
+    def get(self, key):
+        import pyarrow as pa
+        path = self.path(key)
+        try:
+            table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        if table.schema.metadata and table.schema.metadata.get(b'nx_kind') == b'pandas':
+            return table.to_pandas()
+        return pl.from_arrow(table, rechunk=False)
+
+    def put(self, key, data):
+        import pyarrow as pa
+        if _isPandas(data):
+            table = pa.Table.from_pandas(data)
+            kind = b'pandas'
+        else:
+            table = data.to_arrow()
+            kind = b'polars'
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), b'nx_kind': kind})
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return self.get(key)
+
+    def cached(self, key, compute):
+        if key is None:
+            return compute()
+        data = self.get(key)
+        if data is None:
+            data = compute()
+            cached = self.put(key, data)
+            data = data if cached is None else cached
+        return data
+
+    def evict(self, keep=None):
+        files = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.arrow')):
+            try:
+                files.append((os.stat(path), path))
+            except FileNotFoundError:
+                continue
+        files.sort(key=lambda x: x[0].st_mtime)
+        total = sum(x[0].st_size for x in files)
+        for stat, path in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.cache_dir, '*.arrow')):
+            os.remove(path)
+
+
+def fingerprint(data):
+    if data is None or isinstance(data, (str, int, float, bool, os.PathLike)):
+        return _sourceFingerprint(data)
+    if isinstance(data, pl.LazyFrame):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(data, pl.DataFrame):
+        digest.update(f"{data.schema}|{data.shape}".encode())
+        digest.update(data.hash_rows(seed=0).to_numpy().tobytes())
+    elif _isPandas(data):
+        import pandas as pd
+        digest.update(f"{data.dtypes}|{data.shape}".encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    else:
+        values = np.ascontiguousarray(data)
+        digest.update(f"{values.dtype}|{values.shape}".encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def _isPandas(data):
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(data, (pd.DataFrame, pd.Series))
+
+
+def _sourceFingerprint(source):
+    files = sorted(glob.glob(str(source))) if isinstance(source, (str, os.PathLike)) else []
+    stats = [(x, os.stat(x).st_size, os.stat(x).st_mtime_ns) for x in files]
+    return json.dumps([repr(source), stats])
+
+
+def memoize(name, compute, *frames, **params):
+    cache = getCache()
+    if cache is None:
+        return compute()
+    return cache.cached(cache.key(name, *frames, **params), compute)
+
+
+def getCache():
+    global _cache
+    if _cache is None and os.environ.get(cacheEnv):
+        enable(os.environ[cacheEnv], int(os.environ.get(cacheSizeEnv, 10 * 2**30)))
+    return _cache
+
+
+def enable(cache_dir, max_bytes=10 * 2**30):
+    global _cache
+    _cache = Cache(cache_dir, max_bytes)
+    return _cache
+
+
+def disable():
+    global _cache
+    _cache = None
+
+
+@contextmanager
+def caching(cache_dir, max_bytes=10 * 2**30):
+    global _cache
+    previous = _cache
+    enable(cache_dir, max_bytes)
+    try:
+        yield _cache
+    finally:
+        _cache = previous
@@ -0,0 +1,137 @@
+import os
+import numpy as np
+import polars as pl
+
+calendarEnv = 'NX_CALENDAR'
+_calendars = {}
+
+
+class TradeCalendar:
+    def __init__(self, dates):
+        self.dates = np.unique(toIntDate(dates)).astype(np.int32)
+
+    @classmethod
+    def fromFile(cls, file, date_name='date'):
+        file = str(file)
+        if file.endswith('.npy'):
+            return cls(np.load(file))
+        if file.endswith(('.txt', '.csv')):
+            return cls(np.loadtxt(file, dtype=np.int64, ndmin=1, delimiter=',',
+                                  skiprows=0 if file.endswith('.txt') else 1, usecols=0))
+        if file.endswith(('.arrow', '.ipc', '.feather')):
+            return cls(pl.read_ipc(file, columns=[date_name])[date_name].to_numpy())
+        return cls(pl.read_parquet(file, columns=[date_name])[date_name].to_numpy())
+
+    @classmethod
+    def fromData(cls, data, date_name=None):
+        data = data.lazy()
+        if date_name is None:
+            columns = data.collect_schema().names()
+            date_name = ([x for x in columns if x.endswith('__date__')] or columns)[0]
+        dates = data.select(pl.col(date_name).unique()).collect()
+        return cls(dates[date_name].to_numpy())
+
+    @classmethod
+    def fromDates(cls, dates):
+        dates = np.unique(toIntDate(dates))
+        days = toDatetime(dates)
+        gap = int(np.median(np.busday_count(days[:-1], days[1:]))) if len(days) > 1 else 1
+        lead = np.busday_offset(days[0], -max(gap, 1), roll='forward')
+        return cls(np.append(toIntDate(lead), dates))
+
+    @classmethod
+    def weekdays(cls, start_date=19990909, end_date=None):
+        start_date = np.datetime64(_isoDate(start_date))
+        end_date = np.datetime64('today') if end_date is None else np.datetime64(
+            _isoDate(end_date))
+        days = np.arange(start_date, end_date + np.timedelta64(1, 'D'))
+        return cls(days[np.is_busday(days)])
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __contains__(self, date):
+        return bool(self.isTradeDate(date))
+
+    def save(self, file):
+        np.save(file, self.dates)
+
+    def isTradeDate(self, dates):
+        dates = toIntDate(dates)
+        idx = np.searchsorted(self.dates, dates).clip(max=len(self.dates) - 1)
+        return self.dates[idx] == dates
+
+    def shift(self, dates, n=1):
+        dates = toIntDate(dates)
+        if n > 0:
+            idx = np.searchsorted(self.dates, dates, side='right') - 1 + n
+        else:
+            idx = np.searchsorted(self.dates, dates, side='left') + n
+        if np.any((idx < 0) | (idx >= len(self.dates))):
+            raise ValueError(
+                f"Shift by {n} is out of calendar range {self.dates[0]}-{self.dates[-1]}.")
+        return self.dates[idx]
+
+    def next(self, dates):
+        return self.shift(dates, 1)
+
+    def prev(self, dates):
+        return self.shift(dates, -1)
+
+    def range(self, start_date=None, end_date=None):
+        start = 0 if start_date is None else np.searchsorted(
+            self.dates, toIntDate(start_date), side='left')
+        end = len(self.dates) if end_date is None else np.searchsorted(
+            self.dates, toIntDate(end_date), side='right')
+        return self.dates[start:end]
+
+
+def getCalendar(source=None, start_date=None, end_date=None):
+    if isinstance(source, TradeCalendar):
+        return source
+    key = str(source)
+    if key not in _calendars:
+        if source is None:
+            source = os.environ.get(calendarEnv)
+            if source is None:
+                return TradeCalendar.weekdays(19990909 if start_date is None else start_date, end_date)
+        _calendars[key] = TradeCalendar.fromFile(source)
+    return _calendars[key]
+
+
+def hasCalendar(source=None):
+    return source is not None or str(source) in _calendars or bool(os.environ.get(calendarEnv))
+
+
+def setCalendar(calendar, source=None):
+    if not isinstance(calendar, TradeCalendar):
+        calendar = TradeCalendar(calendar)
+    _calendars[str(source)] = calendar
+    return calendar
+
+
+def toIntDate(dates):
+    dates = np.asarray(dates)
+    if np.issubdtype(dates.dtype, np.datetime64):
+        days = dates.astype('datetime64[D]')
+        years = days.astype('datetime64[Y]')
+        months = days.astype('datetime64[M]')
+        return ((years.astype(np.int64) + 1970) * 10000
+                + (months - years).astype(np.int64) * 100 + 100
+                + (days - months).astype(np.int64) + 1)
+    if dates.dtype.kind in 'iuf':
+        return dates.astype(np.int64)
+    if dates.dtype.kind == 'O':
+        return toIntDate(dates.astype('datetime64[D]'))
+    return np.char.replace(dates.astype(str), '-', '').astype(np.int64)
+
+
+def toDatetime(dates):
+    dates = toIntDate(dates)
+    months = ((dates // 10000 - 1970) * 12 + dates // 100 % 100 - 1).astype('datetime64[M]')
+    return months.astype('datetime64[D]') + (dates % 100 - 1).astype('timedelta64[D]')
+
+
+def _isoDate(date):
+    date = str(int(toIntDate(date)))
+    return f"{date[:4]}-{date[4:6]}-{date[6:]}"
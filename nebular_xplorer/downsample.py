@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+
+def minmaxIndices(values, n_buckets):
+    values = np.asarray(values, dtype=np.float64)
+    n_values = len(values)
+    if n_buckets is None or n_values <= 2 * n_buckets:
+        return np.arange(n_values)
+    width = -(-n_values // n_buckets)
+    padded = np.full(n_buckets * width, np.nan)
+    padded[:n_values] = values
+    padded = padded.reshape(n_buckets, width)
+    offset = np.arange(n_buckets) * width
+    lows = offset + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = offset + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    indices = np.concatenate([[0, n_values - 1], lows, highs])
+    return np.unique(indices[indices < n_values])
+
+
+def lttbIndices(values, n_out):
+    values = np.asarray(values, dtype=np.float64)
+    n_values = len(values)
+    if n_out is None or n_values <= n_out or n_out < 3:
+        return np.arange(n_values)
+    if np.isnan(values).any():
+        return minmaxIndices(values, n_out // 2)
+    edges = np.linspace(1, n_values - 1, n_out - 1).astype(np.intp)
+    indices = np.empty(n_out, dtype=np.intp)
+    indices[0], indices[-1] = 0, n_values - 1
+    x = np.arange(n_values, dtype=np.float64)
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n_values
+        next_x = x[end:next_end].mean() if next_end > end else x[-1]
+        next_y = values[end:next_end].mean() if next_end > end else values[-1]
+        area = np.abs((x[selected] - next_x) * (values[start:end] - values[selected])
+                      - (x[selected] - x[start:end]) * (next_y - values[selected]))
+        selected = start + int(np.argmax(area))
+        indices[i + 1] = selected
+    return indices
+
+
+def downsample(data, max_points, method='minmax'):
+    if max_points is None or len(data) <= max_points:
+        return data
+    if isinstance(data, pd.Series):
+        columns = [data.to_numpy(dtype=np.float64)]
+    else:
+        columns = [data[x].to_numpy(dtype=np.float64) for x in data.columns]
+    if method == 'lttb':
+        indices = [lttbIndices(x, max_points) for x in columns]
+    elif method == 'minmax':
+        indices = [minmaxIndices(x, max_points // 2) for x in columns]
+    else:
+        raise ValueError(f"Unknown downsample method {method}.")
+    return data.iloc[np.unique(np.concatenate(indices))]
@@ -1,8 +1,20 @@
+import os
+import sys
+import json
 import time
+import atexit
+import threading
+import functools
+import tracemalloc
+import multiprocessing
 from contextlib import contextmanager
-import sys
 import loguru
 
+profileEnv = 'NX_PROFILE'
+profileMemoryEnv = 'NX_PROFILE_MEMORY'
+_profiler = None
+_profile_env_checked = False
+
 
 class Singleton(type):
     _instances = {}
@@ -47,18 +59,303 @@ class Timer:
     @classmethod
     @contextmanager
     def timeit(cls, message="operation"):
-        start = time.time()
+        start = time.perf_counter()
         cls.time_logger.info(f"{message} started.")
-        yield
+        try:
+            with span(message):
+                yield
+        except BaseException:
+            cls.time_logger.error(
+                f"{message} failed after {time.perf_counter()-start:.2f} seconds.")
+            raise
         cls.time_logger.info(
-            f"{message} finished in {time.time()-start:.2f} seconds.")
+            f"{message} finished in {time.perf_counter()-start:.2f} seconds.")
 
     @classmethod
     def timer(cls, func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            start = time.time()
-            res = func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                with span(func.__qualname__):
+                    res = func(*args, **kwargs)
+            except BaseException:
+                cls.time_logger.error(
+                    f"{func.__name__} failed after {time.perf_counter()-start:.2f} seconds.")
+                raise
             cls.time_logger.info(
-                f"{func.__name__} finished in {time.time()-start:.2f} seconds.")
+                f"{func.__name__} finished in {time.perf_counter()-start:.2f} seconds.")
             return res
         return wrapper
+
+
+class Span:
+    __slots__ = ('profiler', 'name', 'args', 'start', 'end', 'depth', 'parent', 'tid',
+                 'rows', 'mem_start', 'mem_peak', 'max_rss', 'py_start', 'py_peak', 'rss', 'error')
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.rows = None
+        self.mem_start = self.mem_peak = self.py_start = self.py_peak = None
+        self.error = None
+
+    def record(self, data=None, **args):
+        if data is not None:
+            shape = getattr(data, 'shape', None)
+            self.rows = int(shape[0]) if shape else len(data)
+        self.args.update(args)
+        return data
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.profiler._exit(self)
+        return False
+
+    def toDict(self):
+        return {'name': self.name, 'start': self.start, 'duration': self.end - self.start,
+                'depth': self.depth, 'parent': self.parent, 'tid': self.tid, 'rows': self.rows,
+                'mem_peak': self.mem_peak, 'py_peak': self.py_peak, 'rss': self.rss, 'error': self.error,
+                'args': self.args}
+
+
+class _NullSpan:
+    def record(self, data=None, **args):
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+class Profiler:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.spans = []
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.tracing = memory and not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start()
+        self.sampler = None
+        if memory:
+            self.sampler = RssSampler()
+            self.sampler.start()
+
+    def close(self):
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+
+    def span(self, name, **args):
+        return Span(self, name, args)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, span):
+        stack = self._stack()
+        span.depth = len(stack)
+        span.parent = stack[-1].name if stack else None
+        span.tid = threading.get_ident()
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            rss, rss_peak = self.sampler.reset()
+            if stack:
+                stack[-1].py_peak = max(stack[-1].py_peak, peak)
+                stack[-1].mem_peak = max(stack[-1].mem_peak, rss_peak)
+            tracemalloc.reset_peak()
+            span.py_start = span.py_peak = current
+            span.mem_start = span.mem_peak = rss
+            span.max_rss = _maxRss()
+        stack.append(span)
+        span.start = time.perf_counter()
+
+    def _exit(self, span):
+        span.end = time.perf_counter()
+        stack = self._stack()
+        stack.pop()
+        if self.memory:
+            span.rss, rss_peak = self.sampler.reset()
+            max_rss = _maxRss()
+            if max_rss > span.max_rss:
+                rss_peak = max(rss_peak, max_rss)
+            span.mem_peak = max(span.mem_peak, rss_peak)
+            span.py_peak = max(span.py_peak, tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1].mem_peak = max(stack[-1].mem_peak, span.mem_peak)
+                stack[-1].py_peak = max(stack[-1].py_peak, span.py_peak)
+            span.mem_peak -= span.mem_start
+            span.py_peak -= span.py_start
+        else:
+            span.rss = _rss()
+        with self._lock:
+            self.spans.append(span)
+
+    def toJson(self, file=None):
+        spans = [x.toDict() for x in sorted(self.spans, key=lambda x: x.start)]
+        for x in spans:
+            x['start'] -= self.origin
+        if file is not None:
+            with open(file, 'w') as f:
+                json.dump(spans, f, indent=1, default=str)
+        return spans
+
+    def toChromeTrace(self, file=None):
+        events = []
+        for x in sorted(self.spans, key=lambda x: x.start):
+            args = {k: v for k, v in [('rows', x.rows), ('mem_peak', x.mem_peak), ('py_peak', x.py_peak),
+                                      ('rss', x.rss), ('error', x.error)] if v is not None}
+            events.append({'name': x.name, 'cat': 'nx', 'ph': 'X', 'pid': self.pid, 'tid': x.tid,
+                           'ts': (x.start - self.origin) * 1e6, 'dur': (x.end - x.start) * 1e6,
+                           'args': {**args, **{k: str(v) for k, v in x.args.items()}}})
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        if file is not None:
+            with open(file, 'w') as f:
+                json.dump(trace, f)
+        return trace
+
+    def save(self, file, format=None):
+        if format is None:
+            format = 'chrome' if '.trace' in os.path.basename(str(file)) else 'json'
+        if format == 'chrome':
+            return self.toChromeTrace(file)
+        if format == 'json':
+            return self.toJson(file)
+        raise ValueError(f"Unknown profile format {format}.")
+
+    def summary(self):
+        import pandas as pd
+        spans = pd.DataFrame([x.toDict() for x in self.spans], columns=[
+            'name', 'duration', 'rows', 'mem_peak', 'py_peak', 'rss'])
+        summary = spans.groupby('name').agg(
+            calls=('duration', 'size'), total=('duration', 'sum'), mean=('duration', 'mean'),
+            max=('duration', 'max'), rows=('rows', 'max'), mem_peak=('mem_peak', 'max'),
+            py_peak=('py_peak', 'max'), rss=('rss', 'max'))
+        return summary.sort_values('total', ascending=False)
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, interval=0.005):
+        super().__init__(name='nx-rss', daemon=True)
+        self.interval = interval
+        self.peak = _rss()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            rss = _rss()
+            if rss > self.peak:
+                self.peak = rss
+
+    def reset(self):
+        rss = _rss()
+        peak, self.peak = max(self.peak, rss), rss
+        return rss, peak
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return _maxRss()
+
+
+def _maxRss():
+    try:
+        import resource
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def getProfiler():
+    global _profile_env_checked
+    if not _profile_env_checked:
+        _profile_env_checked = True
+        if os.environ.get(profileEnv) and multiprocessing.parent_process() is None:
+            enableProfiling(os.environ.get(profileMemoryEnv, '0') not in ('', '0'))
+            atexit.register(_saveEnvProfile)
+    return _profiler
+
+
+def _saveEnvProfile():
+    if _profiler is not None:
+        _profiler.save(os.environ[profileEnv])
+
+
+def enableProfiling(memory=False):
+    global _profiler
+    disableProfiling()
+    _profiler = Profiler(memory)
+    return _profiler
+
+
+def disableProfiling():
+    global _profiler
+    if _profiler is not None:
+        _profiler.close()
+    _profiler = None
+
+
+@contextmanager
+def profiling(file=None, format=None, memory=False):
+    global _profiler
+    previous = _profiler
+    profiler = _profiler = Profiler(memory)
+    try:
+        yield profiler
+    finally:
+        _profiler = previous
+        profiler.close()
+        if file is not None:
+            profiler.save(file, format)
+
+
+def span(name, **args):
+    profiler = _profiler if _profile_env_checked else getProfiler()
+    if profiler is None:
+        return _null_span
+    return profiler.span(name, **args)
+
+
+def profiled(name=None):
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler if _profile_env_checked else getProfiler()
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.span(span_name) as s:
+                result = func(*args, **kwargs)
+                if getattr(result, 'shape', None):
+                    s.record(result)
+                return result
+        return wrapper
+    return decorator
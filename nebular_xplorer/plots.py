@@ -1,11 +1,23 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-from .stat import cal_nav, DDS, dd_details
+import pandas as pd
 
-def snapshot(return_table):
-    size = list(plt.gcf().get_size_inches())
-    figsize = (size[0], size[1]*1.2)
+from .stat import cal_nav, DDS, worstdd
+from .rolling import rollingIC, rollingIR, rollingSharpe, rollingVolatility, rollingMaxDD
+from .downsample import downsample
+from .log import profiled
+
+
+def _figsize(figsize, height_ratio=1):
+    if figsize is not None:
+        return figsize
+    size = plt.rcParams["figure.figsize"]
+    return (size[0], size[1]*height_ratio)
+
+@profiled('plots.snapshot')
+def snapshot(return_table, figsize=None, max_points=None):
+    figsize = _figsize(figsize, 1.2)
     fig, axes = plt.subplots(3, 1, figsize=figsize, sharex='col', gridspec_kw={'height_ratios': [2, 0.7, 0.7]})
     for ax in axes:
         for spine in ax.spines:
@@ -13,14 +25,15 @@ def snapshot(return_table):
         ax.grid(alpha=0.3)
     for col in return_table.columns:
         axes[0].plot(
-            cal_nav(return_table[col]) * 100,
+            downsample(cal_nav(return_table[col]) * 100, max_points, 'lttb'),
             label=col,
             zorder=1,
         )
     dd = -DDS(return_table)*100
-    for col in dd.columns:
+    dd = {col: downsample(dd[col], max_points) for col in dd.columns}
+    for col in dd:
         axes[1].plot(dd[col], label=col.replace('_dd', ''), lw=1, zorder=1)
-    for col in dd.columns:
+    for col in dd:
         axes[1].fill_between(
             dd[col].index, 0, dd[col], alpha=0.25
         )
@@ -30,7 +43,7 @@ def snapshot(return_table):
 
     for i, col in enumerate(return_table.columns):
         axes[2].plot(
-            return_table[col],
+            downsample(return_table[col], max_points),
             label=col,
             zorder=1,
         )
@@ -39,17 +52,17 @@ def snapshot(return_table):
     axes[0].set_ylabel("Net Value", fontweight="bold", fontsize=12)
     axes[2].set_ylabel("Returns", fontweight="bold", fontsize=12)
     fig.suptitle("Portfolia Performance", fontsize=10)
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 
-def groupNav(return_table):
-    size = list(plt.gcf().get_size_inches())
-    figsize = (size[0], size[1]*0.8)
+@profiled('plots.groupNav')
+def groupNav(return_table, figsize=None, max_points=None):
+    figsize = _figsize(figsize, 0.8)
     fig, ax = plt.subplots(1, 1, figsize=figsize)
     for col in return_table.columns:
         ax.plot(
-            cal_nav(return_table[col]) * 100,
+            downsample(cal_nav(return_table[col]) * 100, max_points, 'lttb'),
             label=col,
             zorder=1,
         )
@@ -59,26 +72,27 @@ def groupNav(return_table):
     ax.grid(alpha=0.3)
     for spine in ax.spines:
         ax.spines[spine].set_visible(False)
-    plt.title(f"Group{len(return_table.columns)} Performance", fontsize=14, fontweight="bold")
+    ax.set_title(f"Group{len(return_table.columns)} Performance", fontsize=14, fontweight="bold")
     return fig
 
-def ic(ic_data):
-    size = list(plt.gcf().get_size_inches())
-    figsize = (size[0], size[1]*1.2)
+@profiled('plots.ic')
+def ic(ic_data, figsize=None, max_points=None):
+    figsize = _figsize(figsize, 1.2)
     fig, axes = plt.subplots(2, 1, figsize=figsize, gridspec_kw={'height_ratios': [2, 1]})
     for ax in axes:
         for spine in ax.spines:
             ax.spines[spine].set_visible(False)
         ax.grid(alpha=0.3)
     for col in ic_data.columns:
-        axes[0].plot(ic_data[col].cumsum(), label=col, zorder=1)
+        axes[0].plot(downsample(ic_data[col].cumsum(), max_points, 'lttb'), label=col, zorder=1)
     axes[0].legend(fontsize=6, ncol=2, frameon=False)
     axes[0].set_ylabel("Cum IC", fontweight="bold", fontsize=12)
     ax_bar = axes[0].twinx()
     for spine in ax_bar.spines:
         ax_bar.spines[spine].set_visible(False)
     for col in ic_data.columns:
-        ax_bar.bar(ic_data.index, ic_data[col], label=col, zorder=1)
+        bars = downsample(ic_data[col], max_points)
+        ax_bar.bar(bars.index, bars, label=col, zorder=1)
     ax_bar.set_ylabel("IC", fontweight="bold", fontsize=12)
     sns.histplot(ic_data, ax=axes[1], bins=40, kde=True, alpha=0.5)
     mean_value = ic_data.mean().values[0]
@@ -100,47 +114,138 @@ def ic(ic_data):
         ha="center",  
     )
     axes[1].set_ylabel("Density", fontweight="bold", fontsize=12)
-    plt.title("Information Coefficient", fontsize=14, fontweight="bold")
+    ax_bar.set_title("Information Coefficient", fontsize=14, fontweight="bold")
     return fig
 
-def icHeatMap(ic_data):
+@profiled('plots.icHeatMap')
+def icHeatMap(ic_data, figsize=None):
     monthly_ic = ic_data.resample("ME").mean()
-    size = list(plt.gcf().get_size_inches())
-    figsize = (size[0], size[1]*0.6)
+    figsize = _figsize(figsize, 0.6)
     fig, ax = plt.subplots(1, 1, figsize=figsize)
     monthly_ic["year"] = monthly_ic.index.year
     monthly_ic["month"] = monthly_ic.index.month
     monthly_ic = monthly_ic.pivot(index='year', columns='month', values=ic_data.columns[0])
     sns.heatmap(monthly_ic, annot=True, fmt=".2f", cmap="coolwarm", ax=ax, center=0, cbar_kws={'label': 'IC'}, annot_kws={"fontsize": 8})
     ax.set_ylabel("Year", fontweight="bold", fontsize=12)
-    plt.title("Monthly IC Heatmap", fontsize=14, fontweight="bold")
+    ax.set_title("Monthly IC Heatmap", fontsize=14, fontweight="bold")
     return fig
 
-def returnHeatMap(return_table):
+@profiled('plots.returnHeatMap')
+def returnHeatMap(return_table, figsize=None):
     monthly_return = return_table.resample("ME").sum()
-    size = list(plt.gcf().get_size_inches())
-    figsize = (size[0], size[1]*0.6)
+    figsize = _figsize(figsize, 0.6)
     fig, ax = plt.subplots(1, 1, figsize=figsize)
     monthly_return["year"] = monthly_return.index.year
     monthly_return["month"] = monthly_return.index.month
     monthly_return = monthly_return.pivot(index='year', columns='month', values=return_table.columns[0])
     sns.heatmap(monthly_return, annot=True, fmt=".2f", cmap="coolwarm", ax=ax, center=0, cbar_kws={'label': 'Return'}, annot_kws={"fontsize": 8})
     ax.set_ylabel("Year", fontweight="bold", fontsize=12)
-    plt.title("Monthly Return Heatmap", fontsize=14, fontweight="bold")
+    ax.set_title("Monthly Return Heatmap", fontsize=14, fontweight="bold")
     return fig
 
-def ddNav(return_table, n=5):
-    ddd = dd_details(return_table)[:n]
-    top_start = [x.index[0] for x in ddd]
-    top_end = [x.index[-1] for x in ddd]
-    size = list(plt.gcf().get_size_inches())
-    figsize = (size[0], size[1]*0.5)
+@profiled('plots.ddNav')
+def ddNav(return_table, n=5, figsize=None, max_points=None):
+    ddd = worstdd(return_table, n)
+    top_start = pd.to_datetime(ddd['Started'])
+    top_end = pd.to_datetime(ddd['Ended'])
+    figsize = _figsize(figsize, 0.5)
     fig, ax = plt.subplots(1, 1, figsize=figsize)
     for spine in ax.spines:
         ax.spines[spine].set_visible(False)
-    ax.plot(return_table.add(1).cumprod())
+    nav = return_table.add(1).cumprod()
+    for col in nav.columns:
+        ax.plot(downsample(nav[col], max_points))
     for i in range(len(top_start)):
         ax.axvspan(top_start[i], top_end[i], color='red', alpha=0.3)
     ax.set_ylabel("Net Value", fontweight="bold", fontsize=12)
-    plt.title("Top Drawdown Periods", fontsize=14, fontweight="bold")
-    return fig
\ No newline at end of file
+    ax.set_title("Top Drawdown Periods", fontsize=14, fontweight="bold")
+    return fig
+
+@profiled('plots.icRolling')
+def icRolling(ic_data, window=60, figsize=None, max_points=None):
+    figsize = _figsize(figsize, 0.8)
+    fig, axes = plt.subplots(2, 1, figsize=figsize, sharex='col')
+    for ax in axes:
+        for spine in ax.spines:
+            ax.spines[spine].set_visible(False)
+        ax.grid(alpha=0.3)
+        ax.axhline(0, color="silver", lw=1.5, zorder=0)
+    rolling_ic = rollingIC(ic_data, window)
+    rolling_ir = rollingIR(ic_data, window)
+    for col in ic_data.columns:
+        axes[0].plot(downsample(rolling_ic[col], max_points, 'lttb'), label=col, lw=1, zorder=1)
+        axes[1].plot(downsample(rolling_ir[col], max_points, 'lttb'), label=col, lw=1, zorder=1)
+    axes[0].legend(fontsize=6, ncol=2, frameon=False)
+    axes[0].set_ylabel("IC", fontweight="bold", fontsize=12)
+    axes[1].set_ylabel("IR", fontweight="bold", fontsize=12)
+    fig.suptitle(f"Rolling {window}D Information Coefficient", fontsize=14, fontweight="bold")
+    fig.tight_layout()
+    return fig
+
+
+@profiled('plots.portRolling')
+def portRolling(return_table, window=252, figsize=None, max_points=None):
+    figsize = _figsize(figsize, 1.2)
+    fig, axes = plt.subplots(3, 1, figsize=figsize, sharex='col')
+    for ax in axes:
+        for spine in ax.spines:
+            ax.spines[spine].set_visible(False)
+        ax.grid(alpha=0.3)
+    sharpe = rollingSharpe(return_table, window)
+    volatility = rollingVolatility(return_table, window)
+    dd = -rollingMaxDD(return_table, window)*100
+    for col in return_table.columns:
+        axes[0].plot(downsample(sharpe[col], max_points, 'lttb'), label=col, lw=1, zorder=1)
+        axes[1].plot(downsample(volatility[col], max_points, 'lttb'), label=col, lw=1, zorder=1)
+        col_dd = downsample(dd[col], max_points)
+        axes[2].plot(col_dd, label=col, lw=1, zorder=1)
+        axes[2].fill_between(col_dd.index, 0, col_dd, alpha=0.25)
+    axes[0].axhline(0, color="silver", lw=1.5, zorder=0)
+    axes[0].legend(fontsize=6, ncol=2, frameon=False)
+    axes[0].set_ylabel("Sharpe", fontweight="bold", fontsize=12)
+    axes[1].set_ylabel("Volatility", fontweight="bold", fontsize=12)
+    axes[2].set_ylabel("MaxDD", fontweight="bold", fontsize=12)
+    fig.suptitle(f"Rolling {window}D Performance", fontsize=14, fontweight="bold")
+    fig.tight_layout()
+    return fig
+
+
+@profiled('plots.turnover')
+def turnover(turnover_table, window=20, figsize=None, max_points=None):
+    figsize = _figsize(figsize, 0.6)
+    fig, ax = plt.subplots(1, 1, figsize=figsize)
+    for spine in ax.spines:
+        ax.spines[spine].set_visible(False)
+    ax.grid(alpha=0.3)
+    rolling_turnover = turnover_table.rolling(window, min_periods=1).mean() * 100
+    for col in turnover_table.columns:
+        ax.plot(downsample(rolling_turnover[col], max_points, 'lttb'), label=col, lw=1, zorder=1)
+    ax.legend(fontsize=6, ncol=2, frameon=False)
+    ax.set_ylabel("Turnover (%)", fontweight="bold", fontsize=12)
+    ax.set_title(f"Rolling {window}D Turnover", fontsize=14, fontweight="bold")
+    return fig
+
+
+@profiled('plots.icDecay')
+def icDecay(ic_decay, value='rankIC', figsize=None):
+    decay = ic_decay.to_pandas() if hasattr(ic_decay, 'to_pandas') else ic_decay
+    decay = decay.assign(name=decay['factor'] + ' | ' + decay['target']).pivot(
+        index='name', columns='lag', values=value)
+    figsize = _figsize(figsize, max(0.6, 0.03 * len(decay)))
+    fig, ax = plt.subplots(1, 1, figsize=figsize)
+    sns.heatmap(decay, annot=len(decay) <= 30, fmt=".3f", cmap="coolwarm", ax=ax, center=0, cbar_kws={'label': value}, annot_kws={"fontsize": 8})
+    ax.set_xlabel("Lag", fontweight="bold", fontsize=12)
+    ax.set_ylabel("")
+    ax.set_title(f"{value} Decay", fontsize=14, fontweight="bold")
+    fig.tight_layout()
+    return fig
+
+
+@profiled('plots.factorCorr')
+def factorCorr(factor_corr, figsize=None):
+    figsize = _figsize(figsize, max(0.8, 0.03 * len(factor_corr)))
+    fig, ax = plt.subplots(1, 1, figsize=figsize)
+    sns.heatmap(factor_corr, annot=len(factor_corr) <= 20, fmt=".2f", cmap="coolwarm", ax=ax, center=0, vmin=-1, vmax=1, cbar_kws={'label': 'Correlation'}, annot_kws={"fontsize": 8})
+    ax.set_title("Factor Correlation", fontsize=14, fontweight="bold")
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,180 @@
+import numpy as np
+import polars as pl
+
+from .utils import check_full_data, get_key_names, dateOffsets, _with_suffix, factorSuffix, dateSuffix, codeSuffix
+from .stat import _dateBlocks
+from .cache import memoize
+from .log import span, profiled
+
+
+def _factorNames(full_data, factor_names):
+    all_factors, _ = check_full_data(full_data)
+    if factor_names is None:
+        return all_factors
+    return [_with_suffix(x, factorSuffix) for x in factor_names]
+
+
+def _output(name, suffix):
+    return f"{name.replace(factorSuffix, '')}{suffix}{factorSuffix}"
+
+
+def _winsorize(data, factor_names, date_name, n_mad=5):
+    medians = [f"{x}__median" for x in factor_names]
+    mads = [f"{x}__mad" for x in factor_names]
+    data = data.with_columns(pl.col(factor_names).cast(pl.Float64).fill_nan(None))
+    data = data.with_columns([
+        pl.col(x).median().over(date_name).alias(m) for x, m in zip(factor_names, medians)])
+    data = data.with_columns([
+        ((pl.col(x) - pl.col(m)).abs().median().over(date_name) * 1.4826).alias(d)
+        for x, m, d in zip(factor_names, medians, mads)])
+    return data.with_columns([
+        pl.col(x).clip(pl.col(m) - n_mad * pl.col(d), pl.col(m) + n_mad * pl.col(d))
+        for x, m, d in zip(factor_names, medians, mads)]).drop(medians + mads)
+
+
+def _standardize(data, factor_names, date_name):
+    data = data.with_columns(pl.col(factor_names).cast(pl.Float64).fill_nan(None))
+    return data.with_columns([
+        (pl.col(x) - pl.col(x).mean().over(date_name)) / pl.col(x).std().over(date_name) for x in factor_names])
+
+
+def _copy(data, factor_names, suffix):
+    outputs = [_output(x, suffix) for x in factor_names]
+    return data.with_columns([pl.col(x).alias(y) for x, y in zip(factor_names, outputs)]), outputs
+
+
+@profiled('preprocess.winsorize')
+def winsorize(full_data, factor_names=None, n_mad=5, suffix='_w'):
+    dateName, _ = get_key_names(full_data)
+    data, outputs = _copy(full_data, _factorNames(full_data, factor_names), suffix)
+    return _winsorize(data, outputs, dateName, n_mad)
+
+
+@profiled('preprocess.standardize')
+def standardize(full_data, factor_names=None, suffix='_z'):
+    dateName, _ = get_key_names(full_data)
+    data, outputs = _copy(full_data, _factorNames(full_data, factor_names), suffix)
+    return _standardize(data, outputs, dateName)
+
+
+@profiled('preprocess.neutralize')
+def neutralize(full_data, exposures, factor_names=None, suffix='_n'):
+    if isinstance(full_data, pl.LazyFrame):
+        full_data = full_data.collect()
+    factor_names = _factorNames(full_data, factor_names)
+    residuals = _residuals(full_data, exposures, factor_names)
+    return full_data.with_columns([
+        pl.Series(_output(name, suffix), residuals[:, i]).fill_nan(None) for i, name in enumerate(factor_names)])
+
+
+def _exposureData(full_data, exposures):
+    dateName, codeName = get_key_names(full_data)
+    data = full_data.with_row_index('__row')
+    if isinstance(exposures, (pl.DataFrame, pl.LazyFrame)):
+        exposures = exposures.lazy().collect() if isinstance(exposures, pl.LazyFrame) else exposures
+        keys = {x: dateName for x in exposures.columns if x == dateName.replace(dateSuffix, '')}
+        keys.update({x: codeName for x in exposures.columns if x == codeName.replace(codeSuffix, '')})
+        exposures = exposures.rename(keys)
+        exposure_names = [x for x in exposures.columns if x not in (dateName, codeName)]
+        exposures = exposures.with_columns(
+            pl.col(dateName).cast(data.schema[dateName]), pl.col(codeName).cast(data.schema[codeName]))
+        data = data.join(exposures, on=[dateName, codeName], how='left')
+    else:
+        exposure_names = [exposures] if isinstance(exposures, str) else list(exposures)
+        exposure_names = [x if x in data.columns else _with_suffix(x, factorSuffix) for x in exposure_names]
+    return data.sort(dateName, maintain_order=True), exposure_names
+
+
+def _design(data, exposure_names):
+    numeric = [x for x in exposure_names if data.schema[x].is_numeric()]
+    categorical = [x for x in exposure_names if x not in numeric]
+    columns = []
+    if numeric:
+        columns.append(data.select(pl.col(numeric).cast(pl.Float64).fill_nan(None)).to_numpy())
+    if categorical:
+        dummies = data.select(pl.col(categorical).cast(pl.String)).to_dummies()
+        missing = data.select(pl.any_horizontal(pl.col(categorical).is_null())).to_series().to_numpy()
+        dummies = dummies.select([x for x in dummies.columns if not x.endswith('_null')]).to_numpy()
+        columns.append(np.where(missing[:, None], np.nan, dummies.astype(np.float64)))
+    else:
+        columns.append(np.ones((data.shape[0], 1)))
+    return np.hstack(columns)
+
+
+def _residuals(full_data, exposures, factor_names):
+    dateName, _ = get_key_names(full_data)
+    with span('preprocess.design') as s:
+        data, exposure_names = _exposureData(full_data, exposures)
+        x_all = _design(s.record(data), exposure_names)
+        y_all = data.select(pl.col(factor_names).cast(pl.Float64).fill_nan(None)).to_numpy()
+    _, bounds = dateOffsets(data, dateName)
+    n_exposures, n_factors = x_all.shape[1], y_all.shape[1]
+    with span('preprocess.solve', exposures=n_exposures, factors=n_factors):
+        for start, end, y in _dateBlocks(y_all, bounds):
+            rows = np.arange(bounds[start], bounds[end])
+            sizes = np.diff(bounds[start:end + 1])
+            index = (np.repeat(np.arange(end - start), sizes), rows - np.repeat(bounds[start:end], sizes))
+            x = np.full(y.shape[:2] + (n_exposures,), np.nan)
+            x[index] = x_all[rows]
+            y_all[rows] = _solveBlock(x, y)[index]
+    order = data['__row'].to_numpy()
+    if (np.diff(order) > 0).all():
+        return y_all
+    residuals = np.empty_like(y_all)
+    residuals[order] = y_all
+    return residuals
+
+
+def _solveBlock(x, y):
+    x_valid = ~np.isnan(x).any(axis=-1)
+    y_valid = ~np.isnan(y) & x_valid[..., None]
+    x = np.where(x_valid[..., None], x, 0.0)
+    xt = x.swapaxes(-1, -2)
+    n_dates, n_codes, n_exposures = x.shape
+    missing = x_valid[..., None] & ~y_valid
+    date, factor, code = np.nonzero(missing.swapaxes(-1, -2))
+    starts = np.flatnonzero(np.diff(date * y.shape[-1] + factor, prepend=-1))
+    lengths = np.diff(np.append(starts, len(date)))
+    if 4 * len(starts) * lengths.max(initial=0) < missing.size:
+        xtx = np.repeat((xt @ x)[:, None], y.shape[-1], axis=1)
+        segment = np.repeat(np.arange(len(starts)), lengths)
+        xm = np.zeros((len(starts), lengths.max(initial=0), n_exposures))
+        xm[segment, np.arange(len(date)) - starts[segment]] = x[date, code]
+        xtx[date[starts], factor[starts]] -= xm.swapaxes(-1, -2) @ xm
+    else:
+        xx = (x[..., :, None] * x[..., None, :]).reshape(n_dates, n_codes, -1)
+        xtx = (np.ascontiguousarray(y_valid.swapaxes(-1, -2), dtype=np.float64) @ xx).reshape(
+            n_dates, y.shape[-1], n_exposures, n_exposures)
+    xty = (xt @ np.where(y_valid, y, 0.0)).swapaxes(-1, -2)
+    scale = np.trace(xtx, axis1=-2, axis2=-1)[..., None, None] / n_exposures
+    ridge = 1e-10 * np.maximum(scale, 1e-12) * np.eye(n_exposures)
+    beta = np.linalg.solve(xtx + ridge, xty[..., None])[..., 0]
+    residuals = np.where(y_valid, y - x @ beta.swapaxes(-1, -2), np.nan)
+    residuals[np.broadcast_to(y_valid.sum(axis=1, keepdims=True) <= n_exposures, residuals.shape)] = np.nan
+    return residuals
+
+
+def preprocess(full_data, factor_names=None, n_mad=5, zscore=True, exposures=None, suffix='_p'):
+    frame = isinstance(exposures, (pl.DataFrame, pl.LazyFrame))
+    return memoize('preprocess', lambda: _preprocess(full_data, factor_names, n_mad, zscore, exposures, suffix),
+                   full_data, exposures if frame else None, factor_names=factor_names, n_mad=n_mad,
+                   zscore=zscore, exposures=None if frame else exposures, suffix=suffix)
+
+
+@profiled('preprocess')
+def _preprocess(full_data, factor_names, n_mad, zscore, exposures, suffix):
+    dateName, _ = get_key_names(full_data)
+    data, outputs = _copy(full_data.lazy(), _factorNames(full_data, factor_names), suffix)
+    if n_mad is not None:
+        data = _winsorize(data, outputs, dateName, n_mad)
+    if zscore:
+        data = _standardize(data, outputs, dateName)
+    with span('preprocess.transform') as s:
+        data = s.record(data.collect())
+    if exposures is None:
+        return data
+    residuals = _residuals(data, exposures, outputs)
+    data = data.with_columns([pl.Series(x, residuals[:, i]).fill_nan(None) for i, x in enumerate(outputs)])
+    if zscore:
+        data = _standardize(data, outputs, dateName)
+    return data
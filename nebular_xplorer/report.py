@@ -1,16 +1,26 @@
 from tabulate import tabulate as _tabulate
 import re as _regex
 import io
+import os
+import json
+import math
 import base64
+import inspect
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import matplotlib
 import matplotlib.pyplot as plt
 
+from .downsample import downsample
+from .log import profiled
+
 pwd = __file__.replace("report.py", "")
 template_file = "template.html"
 template_file = f"{pwd}/{template_file}"
 
-def _html_table(obj, showindex="default"):
+def _html_table(obj, showindex="default", floatfmt=".2f", tablefmt="html"):
     obj = _tabulate(
-        obj, headers="keys", tablefmt="html", floatfmt=".2f", showindex=showindex
+        obj, headers="keys", tablefmt=tablefmt, floatfmt=floatfmt, showindex=showindex
     )
     obj = obj.replace('<table>', '<table style="margin-left: auto; margin-right: auto;">')
     obj = obj.replace(' style="text-align: right;"', ' style="text-align: center;"')
@@ -22,30 +32,181 @@ def _html_table(obj, showindex="default"):
     obj = _regex.sub(" +</th>", "</th>", obj)
     return obj
 
+_chart_script = """<script>
+function nxChart(div) {
+    var chart = JSON.parse(div.getAttribute('data-chart')), w = div.clientWidth || 800, h = chart.height, pad = 40;
+    var colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf'];
+    var values = [].concat.apply([], chart.series.map(function (s) { return s.y; })).filter(function (v) { return v !== null; });
+    var lo = Math.min.apply(null, values), hi = Math.max.apply(null, values), n = chart.length;
+    var x = function (i) { return pad + i * (w - 2 * pad) / Math.max(n - 1, 1); };
+    var y = function (v) { return h - pad - (v - lo) * (h - 2 * pad) / ((hi - lo) || 1); };
+    var svg = '<svg width="' + w + '" height="' + h + '" font-size="10">';
+    chart.series.forEach(function (s, j) {
+        var points = s.x.map(function (i, k) {
+            return s.y[k] === null ? '' : x(i).toFixed(1) + ',' + y(s.y[k]).toFixed(1); }).filter(Boolean).join(' ');
+        svg += '<polyline fill="none" stroke-width="1" stroke="' + colors[j % 10] + '" points="' + points + '"/>';
+        svg += '<text class="nx-label" x="' + (pad + 90 * j) + '" y="12" fill="' + colors[j % 10] + '"></text>';
+    });
+    svg += '<text x="2" y="' + y(hi) + '">' + hi.toFixed(2) + '</text><text x="2" y="' + y(lo) + '">' + lo.toFixed(2) + '</text>';
+    svg += '<text class="nx-label" x="' + pad + '" y="' + (h - 8) + '"></text>';
+    svg += '<text class="nx-label" x="' + (w - pad) + '" y="' + (h - 8) + '" text-anchor="end"></text></svg>';
+    div.innerHTML = svg;
+    var labels = chart.series.map(function (s) { return s.name; }).concat([chart.start, chart.end]);
+    div.querySelectorAll('.nx-label').forEach(function (t, j) { t.textContent = labels[j]; });
+}
+document.addEventListener('DOMContentLoaded', function () { document.querySelectorAll('.nx-chart').forEach(nxChart); });
+</script>"""
+
+def chartJson(data, max_points=1000, height=300):
+    data = data.to_frame() if hasattr(data, 'to_frame') else data
+    index = data.index.strftime('%Y-%m-%d') if hasattr(data.index, 'strftime') else data.index.astype(str)
+    series = []
+    for col in data.columns:
+        values = data[col].reset_index(drop=True).dropna()
+        values = downsample(values, max_points)
+        series.append({'name': str(col), 'x': values.index.tolist(),
+                       'y': [x if math.isfinite(x) else None for x in values.round(6).tolist()]})
+    return json.dumps({
+        'series': series,
+        'length': len(index),
+        'start': index[0] if len(index) else '',
+        'end': index[-1] if len(index) else '',
+        'height': height,
+    }, separators=(',', ':'), allow_nan=False)
+
+def figureBuffer(fig, format='png', dpi=300):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=format, dpi=dpi)
+    plt.close(fig)
+    buf.seek(0)
+    return buf
+
+def _headless():
+    matplotlib.use('Agg')
+
+def _context():
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([f"{__package__}.plots"])
+    return context
+
+def _b64chunks(buf, chunk_size=3 * 2**18):
+    while True:
+        chunk = buf.read(chunk_size)
+        if not chunk:
+            break
+        yield base64.b64encode(chunk).decode('ascii')
+
+def _renderFigure(plot, args, kwargs, format, dpi):
+    return figureBuffer(plot(*args, **kwargs), format=format, dpi=dpi).getvalue()
+
 class HtmlTpl:
+    slot_pattern = _regex.compile(r"(\{\{\w+\}\})")
+
     def __init__(self, template_file=template_file):
         with open(template_file, "r") as f:
-            self.html = f.read()
+            self.parts = self.slot_pattern.split(f.read())
+        self.slots = {}
+        self.has_chart = False
 
+    def _slot(self, title, content):
+        if title not in self.parts[1::2]:
+            parts = []
+            for i, part in enumerate(self.parts):
+                if i % 2 or title not in part:
+                    parts.append(part)
+                    continue
+                for literal in part.split(title):
+                    parts += [literal, title]
+                parts.pop()
+            self.parts = parts
+        self.slots[title] = content
+
+    @profiled('report.addTable')
     def addTable(self, table, title, showindex="default"):
-        table = _html_table(table, showindex)
-        self.html = self.html.replace(title, table)
+        if callable(table):
+            self._slot(title, lambda: _html_table(table(), showindex))
+        else:
+            self._slot(title, _html_table(table, showindex))
+
+    @profiled('report.addChart')
+    def addChart(self, data, title, max_points=1000, height=300):
+        script = '' if self.has_chart else _chart_script
+        chart = chartJson(data, max_points, height).replace("&", "&amp;").replace("'", "&#39;")
+        self._slot(title, f"<div class=\"nx-chart\" data-chart='{chart}'></div>{script}")
+        self.has_chart = True
 
     def addElement(self, figure, title):
-        self.html = self.html.replace(title, figure)
+        self._slot(title, figure)
+
+    def addFigure(self, buf, title, format='png'):
+        if hasattr(buf, 'getvalue'):
+            buf = buf.getvalue()
+        elif hasattr(buf, 'read'):
+            buf.seek(0)
+            buf = buf.read()
+        self._slot(title, (buf, format))
+
+    @profiled('report.addFigures')
+    def addFigures(self, figures, dpi=300, max_workers=None, format='png', max_points=None):
+        if not figures:
+            return
+        max_workers = max_workers or min(len(figures), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=_context(),
+                                 initializer=_headless) as pool:
+            futures = {}
+            for title, (plot, *args) in figures.items():
+                kwargs = args[1] if len(args) > 1 else {}
+                args = args[0] if args else ()
+                if max_points is not None and 'max_points' in inspect.signature(plot).parameters:
+                    kwargs = {'max_points': max_points, **kwargs}
+                futures[pool.submit(_renderFigure, plot, args, kwargs, format, dpi)] = title
+            for future in as_completed(futures):
+                self.addFigure(future.result(), futures[future], format)
 
-    def addFigure(self, buf, title):
-        figdata_png = base64.b64encode(buf.read()).decode('utf8')
-        html_img = f'<img src="data:image/png;base64,{figdata_png}">'
-        self.html = self.html.replace(title, html_img)
+    @profiled('report.write')
+    def write(self, f):
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0 or part not in self.slots:
+                f.write(part)
+                continue
+            content = self.slots[part]
+            if callable(content):
+                content = content()
+            if isinstance(content, tuple):
+                self._writeFigure(f, *content)
+            else:
+                f.write(content)
+
+    def _writeFigure(self, f, buf, format):
+        if callable(buf):
+            buf = buf()
+        if isinstance(buf, matplotlib.figure.Figure):
+            buf = figureBuffer(buf, format=format)
+        if isinstance(buf, bytes):
+            buf = io.BytesIO(buf)
+        buf.seek(0)
+        if format == 'svg':
+            f.write(_regex.sub(r'^.*?(?=<svg)', '', buf.read().decode('utf8'), flags=_regex.S))
+            return
+        f.write(f'<img src="data:image/{format};base64,')
+        for chunk in _b64chunks(buf):
+            f.write(chunk)
+        f.write('">')
 
-    
     def save(self, file):
         with open(file, "w") as f:
-            f.write(self.html)
+            self.write(f)
+
+    @property
+    def html(self):
+        f = io.StringIO()
+        self.write(f)
+        return f.getvalue()
 
     def __str__(self) -> str:
         return self.html
-    
+
     def __repr__(self) -> str:
-        return self.html
\ No newline at end of file
+        return self.html
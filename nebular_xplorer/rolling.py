@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from .stat import _returnMatrix
+
+
+def rollingIC(ic_data, window=60, min_periods=None):
+    mean, _, _ = _rollingMoments(ic_data, window, min_periods)
+    return mean
+
+
+def rollingIR(ic_data, window=60, min_periods=None):
+    mean, std, _ = _rollingMoments(ic_data, window, min_periods)
+    return mean / std
+
+
+def rollingVolatility(return_table, window=252, annl_year=252, min_periods=None):
+    _, std, _ = _rollingMoments(return_table, window, min_periods)
+    return std * np.sqrt(annl_year)
+
+
+def rollingSharpe(return_table, window=252, annl_year=252, min_periods=None):
+    mean, std, _ = _rollingMoments(return_table, window, min_periods)
+    return mean / std * np.sqrt(annl_year)
+
+
+def rollingDrawdown(return_table, window=252):
+    rtn, index, columns = _returnMatrix(return_table)
+    nav = np.cumprod(1 + np.nan_to_num(rtn, nan=0.0), axis=0)
+    peak = _rollingMax(nav, window)
+    return pd.DataFrame(1 - nav / peak, index=index, columns=columns)
+
+
+def rollingMaxDD(return_table, window=252):
+    rtn, index, columns = _returnMatrix(return_table)
+    nav = np.cumprod(1 + np.nan_to_num(rtn, nan=0.0), axis=0)
+    return pd.DataFrame(_rollingMaxDD(nav, window), index=index, columns=columns)
+
+
+def _rollingMoments(data, window, min_periods):
+    values, index, columns = _returnMatrix(data)
+    valid = ~np.isnan(values)
+    with np.errstate(invalid='ignore'):
+        center = np.nanmean(values, axis=0)
+    values = np.where(valid, values - center, 0.0)
+    count = _rollingSum(valid.astype(np.float64), window)
+    total = _rollingSum(values, window)
+    squares = _rollingSum(values * values, window)
+    if min_periods is None:
+        min_periods = 2 if window is None else window
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        std = np.sqrt(np.clip((squares - total * mean) / (count - 1), 0, None))
+    mean[count < max(min_periods, 1)] = np.nan
+    std[count < max(min_periods, 2)] = np.nan
+    return (pd.DataFrame(mean + center, index=index, columns=columns),
+            pd.DataFrame(std, index=index, columns=columns),
+            pd.DataFrame(count, index=index, columns=columns))
+
+
+def _rollingSum(values, window):
+    total = np.cumsum(values, axis=0)
+    if window is None or window >= values.shape[0]:
+        return total
+    total[window:] = total[window:] - total[:-window]
+    return total
+
+
+def _rollingMax(values, window):
+    n_days, n_cols = values.shape
+    if window is None or window >= n_days:
+        return np.fmax.accumulate(values, axis=0)
+    n_blocks = -(-n_days // window)
+    padded = np.full((n_blocks * window, n_cols), -np.inf)
+    padded[:n_days] = values
+    blocks = padded.reshape(n_blocks, window, n_cols)
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(-1, n_cols)
+    suffix = np.maximum.accumulate(
+        blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, n_cols)
+    rolling = np.empty_like(values)
+    rolling[:window - 1] = prefix[:window - 1]
+    rolling[window - 1:] = np.maximum(
+        suffix[:n_days - window + 1], prefix[window - 1:n_days])
+    return rolling
+
+
+def _rollingMaxDD(nav, window):
+    n_days, n_cols = nav.shape
+    if window is None or window >= n_days:
+        return np.maximum.accumulate(1 - nav / np.maximum.accumulate(nav, axis=0), axis=0)
+    n_blocks = -(-n_days // window)
+    padded = np.empty((n_blocks * window, n_cols))
+    padded[:n_days] = nav
+    padded[n_days:] = nav[-1]
+    blocks = padded.reshape(n_blocks, window, n_cols)
+    prefix_max = np.maximum.accumulate(blocks, axis=1)
+    prefix_min = np.minimum.accumulate(blocks, axis=1).reshape(-1, n_cols)
+    prefix_dd = np.maximum.accumulate(1 - blocks / prefix_max, axis=1).reshape(-1, n_cols)
+    reverse = blocks[:, ::-1]
+    suffix_max = np.maximum.accumulate(reverse, axis=1)[:, ::-1].reshape(-1, n_cols)
+    suffix_dd = np.maximum.accumulate(
+        1 - np.minimum.accumulate(reverse, axis=1) / reverse, axis=1)[:, ::-1].reshape(-1, n_cols)
+    rolling = np.empty_like(nav)
+    rolling[:window - 1] = prefix_dd[:window - 1]
+    start, end = slice(0, n_days - window + 1), slice(window - 1, n_days)
+    cross = 1 - prefix_min[end] / suffix_max[start]
+    cross[::window] = 0
+    rolling[window - 1:] = np.maximum(np.maximum(suffix_dd[start], prefix_dd[end]), cross)
+    return rolling
@@ -1,22 +1,292 @@
 import polars as pl
-from .utils import check_full_data, targetSuffix, benchmarkSuffix, dateSuffix, codeSuffix
+from .utils import check_full_data, get_key_names, dateOffsets, _with_suffix, factorSuffix, targetSuffix, benchmarkSuffix, dateSuffix, codeSuffix
 import pandas as pd
 import numpy as np
+from .cache import memoize
+from .log import span, profiled
 
+@profiled('stat.metrics')
 def metrics(full_data, factor_name=None):
-    factor_names, target_names = check_full_data(full_data)
-    dateName = [x for x in full_data.columns if x.endswith(dateSuffix)][0]
+    return memoize('metrics', lambda: _metrics(full_data, factor_name), full_data, factor_name=factor_name)
+
+
+def _metrics(full_data, factor_name):
+    factor_names, _ = check_full_data(full_data)
+    dateName, _ = get_key_names(full_data)
     if factor_name is None:
         factor_name = factor_names[0]
-    ic_data = full_data.group_by(dateName).agg([
-        pl.corr(factor_name, target_name).alias(f"IC_{target_name.replace(targetSuffix, '')}") for target_name in target_names]+[
-        pl.corr(factor_name, target_name, method="spearman").alias(f"rankIC_{target_name.replace(targetSuffix, '')}") for target_name in target_names])
-    ic_data = ic_data.to_pandas().set_index(dateName)
+    dates, _, target_names, ic, rank_ic = _icCube(full_data, [factor_name])
+    target_names = [x.replace(targetSuffix, '') for x in target_names]
+    ic_data = pd.DataFrame(
+        np.concatenate([ic[:, 0, :], rank_ic[:, 0, :]], axis=1),
+        index=pd.Index(dates, name=dateName),
+        columns=[f"IC_{x}" for x in target_names] + [f"rankIC_{x}" for x in target_names])
     ic_data.index = pd.to_datetime(ic_data.index, format='%Y%m%d')
     ic_data = ic_data.sort_index()
     return ic_data
 
+
+@profiled('stat.icMatrix')
+def icMatrix(full_data, factor_names=None, target_names=None):
+    return memoize('icMatrix', lambda: _icMatrix(full_data, factor_names, target_names),
+                   full_data, factor_names=factor_names, target_names=target_names)
+
+
+def _icMatrix(full_data, factor_names, target_names):
+    dateName, _ = get_key_names(full_data)
+    dates, factor_names, target_names, ic, rank_ic = _icCube(
+        full_data, factor_names, target_names)
+    n_factors, n_targets = len(factor_names), len(target_names)
+    return pl.DataFrame({
+        dateName: np.repeat(dates, n_factors * n_targets),
+        'factor': np.tile(np.repeat([x.replace(factorSuffix, '') for x in factor_names], n_targets), len(dates)),
+        'target': np.tile([x.replace(targetSuffix, '') for x in target_names], len(dates) * n_factors),
+        'IC': ic.reshape(-1),
+        'rankIC': rank_ic.reshape(-1),
+    }).fill_nan(None)
+
+
+def _icCube(full_data, factor_names=None, target_names=None):
+    all_factors, all_targets = check_full_data(full_data)
+    factor_names = all_factors if factor_names is None else [
+        _with_suffix(x, factorSuffix) for x in factor_names]
+    target_names = all_targets if target_names is None else [
+        _with_suffix(x, targetSuffix) for x in target_names]
+    dateName, _ = get_key_names(full_data)
+    columns = list(dict.fromkeys(factor_names + target_names))
+    with span('stat.icCube.select') as s:
+        data = s.record(full_data.lazy().select(
+            [dateName] + columns).sort(dateName).with_columns(
+            pl.col(columns).cast(pl.Float64).fill_nan(None)).collect())
+    dates, bounds = dateOffsets(data, dateName)
+    ic = np.full((len(dates), len(factor_names), len(target_names)), np.nan)
+    rank_ic = np.full_like(ic, np.nan)
+    n_factors = len(factor_names)
+    with span('stat.icCube.corr'):
+        values = data.select(factor_names + target_names).to_numpy()
+        for start, end, block in _dateBlocks(values, bounds):
+            x, y = block[..., :n_factors], block[..., n_factors:]
+            ic[start:end] = _pairwiseCorr(x, y)
+            rank_ic[start:end] = _rankCorr(x, y)
+    return dates, factor_names, target_names, ic, rank_ic
+
+
+def _dateBlocks(values, bounds, max_size=2**22):
+    sizes = np.diff(bounds)
+    n_dates, n_cols = len(sizes), values.shape[1]
+    step = max(max_size // max(int(sizes.max(initial=1)) * n_cols, 1), 1)
+    for start in range(0, n_dates, step):
+        end = min(start + step, n_dates)
+        block_sizes = sizes[start:end]
+        block = np.full((end - start, int(block_sizes.max(initial=0)), n_cols), np.nan)
+        rows = np.arange(bounds[start], bounds[end])
+        block[np.repeat(np.arange(end - start), block_sizes),
+              rows - np.repeat(bounds[start:end], block_sizes)] = values[rows]
+        yield start, end, block
+
+
+def _pairwiseCorr(x, y):
+    mx, my = ~np.isnan(x), ~np.isnan(y)
+    fx, fy = mx.astype(np.float64), my.astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x = np.where(mx, x - np.where(mx, x, 0.0).sum(axis=-2, keepdims=True) / fx.sum(axis=-2, keepdims=True), 0.0)
+        y = np.where(my, y - np.where(my, y, 0.0).sum(axis=-2, keepdims=True) / fy.sum(axis=-2, keepdims=True), 0.0)
+        xt, fxt = x.swapaxes(-1, -2), fx.swapaxes(-1, -2)
+        n = fxt @ fy
+        sx, sy = xt @ fy, fxt @ y
+        sxx, syy = (xt * xt) @ fy, fxt @ (y * y)
+        cov = xt @ y - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[n < 2] = np.nan
+    return corr
+
+
+def _completeCorr(x, valid):
+    n = valid[..., :1].sum(axis=-2, keepdims=True).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x = np.where(valid, x - np.where(valid, x, 0.0).sum(axis=-2, keepdims=True) / n, 0.0)
+        x = x / np.sqrt((x * x).sum(axis=-2, keepdims=True))
+        corr = x.swapaxes(-1, -2) @ x
+    corr[np.broadcast_to(n < 2, corr.shape)] = np.nan
+    return corr
+
+
+def _rankCorr(x, y):
+    symmetric = x is y
+    x, y = np.ascontiguousarray(x.swapaxes(-1, -2)), np.ascontiguousarray(y.swapaxes(-1, -2))
+    x_valid, y_valid = ~np.isnan(x), ~np.isnan(y)
+    x_index = _rankIndex(x)
+    y_index = x_index if symmetric else _rankIndex(y)
+    x_rank = _plainRank(x_index, x_valid)
+    y_rank = x_rank if symmetric else _plainRank(y_index, y_valid)
+    corr = np.full(x.shape[:2] + y.shape[1:2], np.nan)
+    for t in range(y.shape[1]):
+        k = t + 1 if symmetric else x.shape[1]
+        t_valid = y_valid[:, t:t + 1]
+        valid = x_valid[:, :k] & t_valid
+        index = [None if z is None else z[:, :k] for z in x_index]
+        xr = _partialRank(index, x_rank[:, :k], valid, (x_valid[:, :k] & ~t_valid).any(axis=-1))
+        t_index = [None if z is None else z[:, t:t + 1] for z in y_index]
+        yr = _partialRank(t_index, y_rank[:, t:t + 1], valid, (t_valid & ~x_valid[:, :k]).any(axis=-1))
+        corr[:, :k, t] = _columnCorr(xr, yr)
+    if symmetric:
+        upper = np.triu_indices(x.shape[1], 1)
+        corr[:, upper[1], upper[0]] = corr[:, upper[0], upper[1]]
+    return corr
+
+
+def _rankIndex(x):
+    order = np.argsort(x if np.isposinf(x).any() else np.where(np.isnan(x), np.inf, x), axis=-1)
+    x = np.take_along_axis(x, order, axis=-1)
+    n = x.shape[-1]
+    pos = np.arange(n)
+    first = np.ones(x.shape, dtype=bool)
+    first[..., 1:] = x[..., 1:] != x[..., :-1]
+    tied = ~first.all(axis=-1)
+    if not tied.any():
+        return order, None, None, tied
+    last = np.ones(x.shape, dtype=bool)
+    last[..., :-1] = first[..., 1:]
+    starts = np.maximum.accumulate(np.where(first, pos, 0), axis=-1)
+    ends = np.flip(np.minimum.accumulate(np.flip(np.where(last, pos, n - 1), axis=-1), axis=-1), axis=-1)
+    return order, starts, ends, tied
+
+
+def _plainRank(index, valid):
+    order, starts, ends, _ = index
+    n_valid = valid.sum(axis=-1, keepdims=True)
+    pos = np.arange(valid.shape[-1])
+    ranks = np.empty(valid.shape)
+    np.put_along_axis(ranks, order, np.where(
+        pos < n_valid, pos + 1.0 if starts is None else (starts + ends) / 2 + 1, np.nan), axis=-1)
+    return ranks
+
+
+def _partialRank(index, ranks, valid, rows):
+    if not rows.any():
+        return ranks
+    if rows.all():
+        return _maskedRank(index, valid)
+    ranks = np.broadcast_to(ranks, valid.shape).copy()
+    index = [None if z is None else np.broadcast_to(z, valid.shape[:z.ndim])[rows] for z in index]
+    ranks[rows] = _maskedRank(index, valid[rows])
+    return ranks
+
+
+def _maskedRank(index, valid):
+    order, starts, ends, tied = index
+    valid = np.take_along_axis(valid, order, axis=-1)
+    counts = np.cumsum(valid, axis=-1)
+    ranks = counts.astype(np.float64)
+    rows = np.broadcast_to(tied, valid.shape[:-1])
+    if starts is not None and rows.any():
+        valid_rows, counts = valid[rows], counts[rows]
+        before = np.take_along_axis(counts - valid_rows, np.broadcast_to(starts, valid.shape)[rows], axis=-1)
+        in_run = np.take_along_axis(counts, np.broadcast_to(ends, valid.shape)[rows], axis=-1) - before
+        ranks[rows] = before + (in_run + 1) / 2
+    ranks[~valid] = np.nan
+    np.put_along_axis(ranks, np.broadcast_to(order, valid.shape), ranks.copy(), axis=-1)
+    return ranks
+
+
+def _columnCorr(x, y):
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    n = valid.sum(axis=-1)
+    x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+    sx, sy = x.sum(axis=-1), y.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = np.einsum('...i,...i->...', x, y) - sx * sy / n
+        var_x = np.einsum('...i,...i->...', x, x) - sx * sx / n
+        var_y = np.einsum('...i,...i->...', y, y) - sy * sy / n
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[n < 2] = np.nan
+    return corr
+
+
+@profiled('stat.icDecay')
+def icDecay(full_data, factor_names=None, target_names=None, max_lag=10):
+    return memoize('icDecay', lambda: _icDecay(full_data, factor_names, target_names, max_lag),
+                   full_data, factor_names=factor_names, target_names=target_names, max_lag=max_lag)
+
+
+def _icDecay(full_data, factor_names, target_names, max_lag):
+    all_factors, all_targets = check_full_data(full_data)
+    factor_names = all_factors if factor_names is None else [
+        _with_suffix(x, factorSuffix) for x in factor_names]
+    target_names = all_targets if target_names is None else [
+        _with_suffix(x, targetSuffix) for x in target_names]
+    dateName, codeName = get_key_names(full_data)
+    lags = list(range(max_lag + 1))
+    date_index = pl.col(dateName).rank('dense').cast(pl.Int64)
+    lagged = {(x, lag): f"{x.replace(targetSuffix, '')}__lag{lag}{targetSuffix}" for x in target_names for lag in lags}
+    data = full_data.lazy().select(
+        [dateName, codeName] + factor_names + target_names).with_columns(date_index.alias('__t'))
+    lagged_data = data.select([dateName, codeName, '__t'] + factor_names)
+    for lag in lags:
+        lagged_data = lagged_data.join(data.select(
+            codeName, pl.col('__t') - lag, *[pl.col(x).alias(lagged[x, lag]) for x in target_names]),
+            on=[codeName, '__t'], how='left')
+    data = lagged_data.select([dateName, codeName] + factor_names + list(lagged.values())).collect()
+    _, factor_names, _, ic, rank_ic = _icCube(data, factor_names, list(lagged.values()))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stats = {}
+        for name, values in [('IC', ic), ('rankIC', rank_ic)]:
+            count = (~np.isnan(values)).sum(axis=0)
+            stats[name] = np.nanmean(values, axis=0)
+            stats[name.replace('IC', 'IR')] = stats[name] / np.nanstd(values, axis=0, ddof=1)
+            stats[name][count == 0] = np.nan
+    n_factors = len(factor_names)
+    return pl.DataFrame({
+        'factor': np.repeat([x.replace(factorSuffix, '') for x in factor_names], len(lagged)),
+        'target': np.tile([x.replace(targetSuffix, '') for x, _ in lagged], n_factors),
+        'lag': np.tile([lag for _, lag in lagged], n_factors),
+        **{x: stats[x].reshape(-1) for x in ['IC', 'rankIC', 'IR', 'rankIR']},
+    }).fill_nan(None)
+
+
+@profiled('stat.factorCorr')
+def factorCorr(full_data, factor_names=None, method='rank', exact=False):
+    return memoize('factorCorr', lambda: _factorCorr(full_data, factor_names, method, exact),
+                   full_data, factor_names=factor_names, method=method, exact=exact)
+
+
+def _factorCorr(full_data, factor_names, method, exact):
+    all_factors, _ = check_full_data(full_data)
+    factor_names = all_factors if factor_names is None else [
+        _with_suffix(x, factorSuffix) for x in factor_names]
+    dateName, _ = get_key_names(full_data)
+    if method not in ['rank', 'pearson']:
+        raise ValueError(f"Unknown correlation method {method}.")
+    data = full_data.lazy().select(
+        dateName, pl.col(factor_names).cast(pl.Float64).fill_nan(None)).sort(dateName).collect()
+    _, bounds = dateOffsets(data, dateName)
+    values = data.select(factor_names).to_numpy()
+    total = np.zeros((len(factor_names), len(factor_names)))
+    count = np.zeros_like(total)
+    for _, _, block in _dateBlocks(values, bounds):
+        valid = ~np.isnan(block)
+        complete = (valid.all(axis=-1) == valid.any(axis=-1)).all()
+        if method == 'rank' and exact and not complete:
+            corr = _rankCorr(block, block)
+        else:
+            if method == 'rank':
+                block = np.ascontiguousarray(block.swapaxes(-1, -2))
+                block = _plainRank(_rankIndex(block), ~np.isnan(block)).swapaxes(-1, -2)
+            corr = _completeCorr(block, valid) if complete else _pairwiseCorr(block, block)
+        valid = ~np.isnan(corr)
+        total += np.where(valid, corr, 0.0).sum(axis=0)
+        count += valid.sum(axis=0)
+    names = [x.replace(factorSuffix, '') for x in factor_names]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame(total / count, index=names, columns=names)
+
+
+@profiled('stat.summaryMetrics')
 def summaryMetrics(factor_metrics):
+    if isinstance(factor_metrics, pl.DataFrame):
+        return _summaryIcMatrix(factor_metrics)
     ic_table = {}
     for target_name in factor_metrics.columns:
         target_name = '_'.join(target_name.split('_')[1:])
@@ -33,21 +303,85 @@ def summaryMetrics(factor_metrics):
     ic_table = pd.DataFrame.from_dict(ic_table, orient='index').round(4)
     return ic_table.sort_index()
 
+def _summaryIcMatrix(ic_matrix):
+    dateName = [x for x in ic_matrix.columns if x.endswith(dateSuffix)][0]
+    date = pl.col(dateName).cast(pl.String).str.to_date('%Y%m%d')
+    ic_table = ic_matrix.group_by('factor', 'target').agg(
+        pl.col('IC').mean().alias('IC'),
+        pl.col('rankIC').mean().alias('rankIC'),
+        (pl.col('IC').mean() / pl.col('IC').std()).alias('IR'),
+        (pl.col('rankIC').mean() / pl.col('rankIC').std()).alias('rankIR'),
+        date.min().dt.strftime('%Y-%m-%d').alias('begin_date'),
+        date.max().dt.strftime('%Y-%m-%d').alias('end_date'),
+    )
+    ic_table = ic_table.to_pandas().set_index(['factor', 'target']).round(4)
+    return ic_table.sort_index()
+
 def cal_nav(rtn_table):
     return (1 + rtn_table).cumprod()
 
 def calculate_maxdd(nav_table):
-    max_values = np.maximum.accumulate(nav_table)
-    drawdowns = 1 - nav_table / max_values
-    max_dd = drawdowns.max()
-    max_dd_end = drawdowns.idxmax()
-    max_dd_start = pd.Series(
-        np.nan, index=nav_table.columns, dtype='datetime64[ns]')
-    for col in nav_table.columns:
-        max_dd_start[col] = drawdowns.loc[:max_dd_end[col], col].idxmax()
-    drawdowns.columns = [f'{x}_dd' for x in drawdowns.columns]
+    nav = nav_table.to_numpy(dtype=np.float64)
+    dd = _drawdowns(nav)
+    trough = _nanargmax(dd)
+    peak = _peaks(dd)[trough, np.arange(dd.shape[1])]
+    max_dd = pd.Series(np.nanmax(dd, axis=0, initial=0), index=nav_table.columns)
+    max_dd_start = pd.Series(nav_table.index[peak], index=nav_table.columns)
+    max_dd_end = pd.Series(nav_table.index[trough], index=nav_table.columns)
+    drawdowns = pd.DataFrame(
+        dd, index=nav_table.index, columns=[f'{x}_dd' for x in nav_table.columns])
     return max_dd, max_dd_start.dt.strftime("%Y-%m-%d"), max_dd_end.dt.strftime("%Y-%m-%d"), drawdowns
 
+@profiled('stat.ddEpisodes')
+def ddEpisodes(rtn_table):
+    dd = _drawdowns(_navMatrix(rtn_table))
+    n_days, n_cols = dd.shape
+    in_dd = np.zeros((n_cols, n_days + 2), dtype=np.int8)
+    in_dd[:, 1:-1] = (dd > 0).T
+    edges = np.diff(in_dd, axis=1)
+    column, start = np.nonzero(edges == 1)
+    _, end = np.nonzero(edges == -1)
+    flat = np.append(dd.T.ravel(), 0)
+    offset = column * n_days
+    lengths = end - start
+    depth = np.maximum.reduceat(
+        flat, np.stack([offset + start, offset + end], axis=1).ravel())[::2] if len(start) else np.zeros(0)
+    episode = np.repeat(np.arange(len(start)), lengths)
+    position = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) \
+        + np.repeat(offset + start, lengths)
+    at_depth = flat[position] == depth[episode]
+    _, first = np.unique(episode[at_depth], return_index=True)
+    trough = position[at_depth][first] - offset
+    recovery = np.where(end < n_days, end, -1)
+    return {
+        'column': column,
+        'peak': start - 1,
+        'trough': trough,
+        'recovery': recovery,
+        'depth': depth,
+        'duration': np.where(recovery >= 0, recovery, n_days - 1) - start + 2,
+    }
+
+def _navMatrix(rtn_table):
+    if hasattr(rtn_table, 'to_numpy'):
+        rtn_table = rtn_table.to_numpy(dtype=np.float64)
+    rtn = np.asarray(rtn_table, dtype=np.float64)
+    if rtn.ndim == 1:
+        rtn = rtn[:, None]
+    return np.cumprod(1 + np.nan_to_num(rtn, nan=0.0), axis=0)
+
+def _drawdowns(nav):
+    if nav.ndim == 1:
+        nav = nav[:, None]
+    return 1 - nav / np.fmax.accumulate(nav, axis=0)
+
+def _peaks(dd):
+    days = np.arange(dd.shape[0])[:, None]
+    return np.maximum.accumulate(np.where(np.isnan(dd) | (dd > 0), 0, days), axis=0)
+
+def _nanargmax(dd):
+    return np.argmax(np.nan_to_num(dd, nan=-np.inf), axis=0)
+
 def ARR_SI(rtn_table, annl_year=252):
     return rtn_table.sum() / rtn_table.shape[0] * annl_year
 
@@ -61,9 +395,7 @@ def Sharpe(rtn_table, annl_year=252):
     return ARR_SI(rtn_table, annl_year) / Volatility(rtn_table, annl_year)
 
 def Calmar(rtn_table, annl_year=252):
-    nav_table = cal_nav(rtn_table)
-    max_dd, _, _, _ = calculate_maxdd(nav_table)
-    return ARR_SI(rtn_table, annl_year) / max_dd
+    return ARR_SI(rtn_table, annl_year) / MaxDD(rtn_table)
 
 def WinRate(rtn_table):
     return (rtn_table > 0).mean()
@@ -72,51 +404,123 @@ def PLRatio(rtn_table):
     return rtn_table[rtn_table > 0].mean() / -rtn_table[rtn_table < 0].mean()
 
 def MaxDD(rtn_table):
-    nav_table = cal_nav(rtn_table)
-    max_dd, _, _, _ = calculate_maxdd(nav_table)
-    return max_dd
+    max_dd = _drawdowns(_navMatrix(rtn_table)).max(axis=0)
+    if isinstance(rtn_table, pd.DataFrame):
+        return pd.Series(max_dd, index=rtn_table.columns)
+    return max_dd[0]
 
 def DDS(rtn_table):
-    nav_table = cal_nav(rtn_table)
-    _, _, _, drawdowns = calculate_maxdd(nav_table)
-    return drawdowns
-
-def getPortStat(return_table, annl_year=252):
-    nav_table = (return_table + 1).cumprod()
-    max_dd, max_dd_start, max_dd_end, _ = calculate_maxdd(
-        nav_table)
-    stat_return = {}
-    stat_return["ARR_SI"] = ARR_SI(return_table, annl_year)
-    stat_return["ARR_CI"] = ARR_CI(return_table, annl_year)
-    stat_return["Volatility"] = Volatility(return_table, annl_year)
-    stat_return["Sharpe"] = Sharpe(return_table, annl_year)
-    stat_return["Calmar"] = Calmar(return_table, annl_year)
-    stat_return["Win Rate"] = WinRate(return_table)
-    stat_return["PL Ratio"] = PLRatio(return_table)
+    dd = _drawdowns(_navMatrix(rtn_table))
+    if isinstance(rtn_table, pd.Series):
+        return pd.Series(dd[:, 0], index=rtn_table.index, name=f'{rtn_table.name}_dd')
+    return pd.DataFrame(dd, index=rtn_table.index, columns=[f'{x}_dd' for x in rtn_table.columns])
+
+@profiled('stat.getPortStat')
+def getPortStat(return_table, annl_year=252, turnover=None):
+    return portStats(return_table, annl_year, turnover).round(2)
+
+@profiled('stat.portStats')
+def portStats(return_table, annl_year=252, turnover=None):
+    rtn, index, columns = _returnMatrix(return_table)
+    n_days = rtn.shape[0]
+    valid = ~np.isnan(rtn)
+    rtn = np.where(valid, rtn, 0.0)
+    count = valid.sum(axis=0)
+    total = rtn.sum(axis=0)
+    mean = total / count
+    dev = np.where(valid, rtn - mean, 0.0)
+    downside = np.minimum(rtn, 0.0)
+    win = rtn > 0
+    loss = rtn < 0
+    nav = np.cumprod(1 + rtn, axis=0)
+    dd = _drawdowns(nav)
+    trough = _nanargmax(dd)
+    peak = _peaks(dd)[trough, np.arange(dd.shape[1])]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        arr_si = total / n_days * annl_year
+        volatility = np.sqrt((dev * dev).sum(axis=0) / (count - 1)) * np.sqrt(annl_year)
+        max_dd = dd.max(axis=0)
+        stat_return = {}
+        stat_return["ARR_SI"] = arr_si
+        stat_return["ARR_CI"] = nav[-1] ** (annl_year / n_days) - 1
+        stat_return["Volatility"] = volatility
+        stat_return["Sharpe"] = arr_si / volatility
+        stat_return["Calmar"] = arr_si / max_dd
+        stat_return["Win Rate"] = win.sum(axis=0) / n_days
+        stat_return["PL Ratio"] = (rtn * win).sum(axis=0) / win.sum(axis=0) / \
+            -((rtn * loss).sum(axis=0) / loss.sum(axis=0))
+        stat_return["Sortino"] = arr_si / (
+            np.sqrt((downside * downside).sum(axis=0) / n_days) * np.sqrt(annl_year))
+        upper, lower = _nanquantiles(rtn, valid, count, [0.95, 0.05])
+        stat_return["Tail Ratio"] = np.abs(upper / lower)
     stat_return['MaxDD'] = max_dd
-    stat_return['MaxDDStart'] = max_dd_start
-    stat_return['MaxDDEnd'] = max_dd_end
-    return pd.DataFrame(stat_return).round(2)
+    stat_return['MaxDDStart'] = _dateLabels(index[peak])
+    stat_return['MaxDDEnd'] = _dateLabels(index[trough])
+    if turnover is not None:
+        turnover = turnover.reindex(columns=columns)
+        stat_return['Turnover'] = turnover.mean().to_numpy()
+        stat_return['Ann. Turnover'] = stat_return['Turnover'] * annl_year
+    return pd.DataFrame(stat_return, index=columns)
+
+def _returnMatrix(return_table):
+    if isinstance(return_table, pl.DataFrame):
+        dates = [x for x in return_table.columns if x.endswith(dateSuffix)
+                 or return_table.schema[x].is_temporal()]
+        columns = [x for x in return_table.columns if x not in dates]
+        index = return_table[dates[0]].to_numpy() if dates else np.arange(return_table.shape[0])
+        rtn = return_table.select(columns).to_numpy()
+    elif isinstance(return_table, pd.Series):
+        index, columns = return_table.index, [return_table.name]
+        rtn = return_table.to_numpy(dtype=np.float64)
+    elif isinstance(return_table, pd.DataFrame):
+        index, columns = return_table.index, list(return_table.columns)
+        rtn = return_table.to_numpy(dtype=np.float64)
+    else:
+        rtn = np.asarray(return_table, dtype=np.float64)
+        index, columns = np.arange(rtn.shape[0]), None
+    rtn = np.ascontiguousarray(rtn, dtype=np.float64)
+    if rtn.ndim == 1:
+        rtn = rtn[:, None]
+    if columns is None:
+        columns = list(range(rtn.shape[1]))
+    return rtn, np.asarray(index), columns
 
+def _nanquantiles(rtn, valid, count, qs):
+    ordered = np.sort(np.where(valid, rtn, np.nan), axis=0)
+    quantiles = []
+    for q in qs:
+        position = q * (count - 1).clip(min=0)
+        lower = np.floor(position).astype(np.intp)[None, :]
+        upper = np.ceil(position).astype(np.intp)[None, :]
+        lower, upper = np.take_along_axis(ordered, lower, 0)[0], np.take_along_axis(ordered, upper, 0)[0]
+        quantiles.append(lower + (upper - lower) * (position % 1))
+    return quantiles
+
+def _dateLabels(dates):
+    if np.issubdtype(dates.dtype, np.datetime64):
+        return pd.DatetimeIndex(dates).strftime("%Y-%m-%d")
+    return dates
+
+@profiled('stat.dd_details')
 def dd_details(return_table):
-    drawdowns = DDS(return_table)
-    value_name = return_table.columns[0]+"_dd"
-    split_indices = drawdowns.index[drawdowns[value_name] == 0].tolist()
-    split_positions = [drawdowns.index.get_loc(idx) for idx in split_indices]
-    split_indices = [-1] + split_positions + [len(drawdowns)]
-    dfs = [drawdowns.iloc[split_indices[i]:split_indices[i+1]+1] for i in range(len(split_indices)-1)]
-    dfs = [x for x in dfs if len(x[x.values!=0]) > 0]
-    return sorted(dfs, key=lambda x: x[value_name].max(), reverse=True)
+    drawdowns = DDS(return_table.iloc[:, :1])
+    episodes = _worstEpisodes(ddEpisodes(return_table.iloc[:, :1]))
+    n_days = drawdowns.shape[0]
+    return [drawdowns.iloc[peak:(recovery if recovery >= 0 else n_days - 1) + 1]
+            for peak, recovery in zip(episodes['peak'], episodes['recovery'])]
 
+@profiled('stat.worstdd')
 def worstdd(return_table, n=5):
-    ddd = dd_details(return_table)[:n]
-    started = [x.index[0].strftime('%Y-%m-%d') for x in ddd]
-    ended = [x.index[-1].strftime('%Y-%m-%d') for x in ddd]
-    dd = [x.max().values[0] for x in ddd]
-    periods = [x.shape[0] for x in ddd]
+    episodes = _worstEpisodes(ddEpisodes(return_table.iloc[:, :1]), n)
+    index = return_table.index
+    ended = np.where(episodes['recovery'] >= 0, episodes['recovery'], len(index) - 1)
     return pd.DataFrame({
-        'Started': started,
-        'Ended': ended,
-        'DrawDown': dd,
-        'Days': periods
-    })
\ No newline at end of file
+        'Started': index[episodes['peak']].strftime('%Y-%m-%d'),
+        'Ended': index[ended].strftime('%Y-%m-%d'),
+        'DrawDown': episodes['depth'],
+        'Days': episodes['duration']
+    })
+
+def _worstEpisodes(episodes, n=None):
+    order = np.argsort(-episodes['depth'], kind='stable')[:n]
+    return {k: v[order] for k, v in episodes.items()}
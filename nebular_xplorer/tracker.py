@@ -0,0 +1,187 @@
+import json
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from .utils import _prepare, dateOffsets, getReturnTables, getLagDate, check_full_data, get_key_names, _with_suffix, factorSuffix, targetSuffix
+from .calendar import hasCalendar, TradeCalendar
+from .stat import _icCube
+
+_portFields = ['count', 'mean', 'm2', 'total', 'nav', 'peak', 'peak_date', 'max_dd',
+               'max_dd_start', 'max_dd_end', 'wins', 'win_sum', 'losses', 'loss_sum', 'downside']
+_icFields = ['count', 'mean', 'm2', 'rank_count', 'rank_mean', 'rank_m2']
+
+
+class FactorTracker:
+    def __init__(self, factor_name, target_name=None, n_groups=10, n_top=[200, 1000], annl_year=252):
+        self.factor_name = factor_name.replace(factorSuffix, '')
+        self.target_name = None if target_name is None else target_name.replace(targetSuffix, '')
+        self.n_groups = n_groups
+        self.n_top = list(n_top)
+        self.annl_year = annl_year
+        self.n_days = 0
+        self.begin_date = None
+        self.lag_date = None
+        self.last_date = None
+        self.portfolios = []
+        self.targets = []
+        self.port = {x: np.zeros(0) for x in _portFields}
+        self.ic = {x: np.zeros(0) for x in _icFields}
+
+    def update(self, factors, targets=None, key_name=['date', 'code']):
+        full_data = factors if targets is None else _prepare(factors, targets, key_name, None, None)
+        dateName, _ = get_key_names(full_data)
+        if self.last_date is not None:
+            full_data = full_data.filter(pl.col(dateName) > self.last_date)
+        if not full_data[dateName].is_sorted():
+            full_data = full_data.sort(dateName, maintain_order=True)
+        dates, bounds = dateOffsets(full_data)
+        if self.begin_date is None and len(dates):
+            self.lag_date = _firstLag(dates)
+        days = [(int(date), full_data.slice(int(start), int(end - start)))
+                for date, start, end in zip(dates, bounds[:-1], bounds[1:])]
+        daily = []
+        for date, day_data in days:
+            daily.append(self._updateDate(day_data, date))
+        if not daily:
+            return pd.DataFrame()
+        daily = pd.concat(daily, axis=1).T
+        daily.index = pd.to_datetime(daily.index.astype(str), format='%Y%m%d')
+        return daily
+
+    def _updateDate(self, day_data, date):
+        factor_names, target_names = check_full_data(day_data)
+        factor_name = _with_suffix(self.factor_name, factorSuffix)
+        if self.target_name is None:
+            self.target_name = target_names[0].replace(targetSuffix, '')
+        returns = getReturnTables(day_data.lazy(), [factor_name], [self.target_name], [self.n_groups], self.n_top)
+        returns = dict(zip(returns['portfolio'].to_list(), returns['return'].to_list()))
+        _, _, target_names, ic, rank_ic = _icCube(day_data, [factor_name])
+        target_names = [x.replace(targetSuffix, '') for x in target_names]
+        if self.begin_date is None:
+            self.begin_date = date
+        self._updatePortfolios(returns, date)
+        self._updateIC(dict(zip(target_names, ic[0, 0])), dict(zip(target_names, rank_ic[0, 0])))
+        self.last_date = date
+        return pd.Series(
+            {**{x: returns.get(x, np.nan) for x in self.portfolios},
+             **{f"IC_{x}": v for x, v in zip(target_names, ic[0, 0])},
+             **{f"rankIC_{x}": v for x, v in zip(target_names, rank_ic[0, 0])}}, name=date)
+
+    def _updatePortfolios(self, returns, date):
+        new = [x for x in sorted(returns) if x not in self.portfolios]
+        if new:
+            self.portfolios += new
+            start = {'count': 1.0, 'nav': 1.0, 'peak': 1.0, 'peak_date': self._lagDate(),
+                     'max_dd_start': self._lagDate(), 'max_dd_end': self._lagDate()}
+            for x in _portFields:
+                self.port[x] = np.append(self.port[x], np.full(len(new), start.get(x, 0.0)))
+        if self.n_days == 0:
+            self.n_days = 1
+        self.n_days += 1
+        p = self.port
+        rtn = np.array([returns.get(x, np.nan) for x in self.portfolios], dtype=np.float64)
+        valid = ~np.isnan(rtn)
+        rtn = np.where(valid, rtn, 0.0)
+        count = p['count'] + valid
+        delta = rtn - p['mean']
+        p['mean'] = np.where(valid, p['mean'] + delta / count, p['mean'])
+        p['m2'] = np.where(valid, p['m2'] + delta * (rtn - p['mean']), p['m2'])
+        p['count'] = count
+        p['total'] += rtn
+        p['wins'] += rtn > 0
+        p['win_sum'] += np.where(rtn > 0, rtn, 0.0)
+        p['losses'] += rtn < 0
+        p['loss_sum'] += np.where(rtn < 0, rtn, 0.0)
+        p['downside'] += np.minimum(rtn, 0.0) ** 2
+        p['nav'] *= 1 + rtn
+        at_peak = p['nav'] >= p['peak']
+        p['peak'] = np.where(at_peak, p['nav'], p['peak'])
+        p['peak_date'] = np.where(at_peak, date, p['peak_date'])
+        dd = 1 - p['nav'] / p['peak']
+        deeper = dd > p['max_dd']
+        p['max_dd'] = np.where(deeper, dd, p['max_dd'])
+        p['max_dd_start'] = np.where(deeper, p['peak_date'], p['max_dd_start'])
+        p['max_dd_end'] = np.where(deeper, date, p['max_dd_end'])
+
+    def _updateIC(self, ic, rank_ic):
+        new = [x for x in ic if x not in self.targets]
+        if new:
+            self.targets += new
+            for x in _icFields:
+                self.ic[x] = np.append(self.ic[x], np.zeros(len(new)))
+        s = self.ic
+        for prefix, values in [('', ic), ('rank_', rank_ic)]:
+            values = np.array([values.get(x, np.nan) for x in self.targets], dtype=np.float64)
+            valid = ~np.isnan(values)
+            values = np.where(valid, values, 0.0)
+            count = s[f'{prefix}count'] + valid
+            delta = values - s[f'{prefix}mean']
+            with np.errstate(invalid='ignore', divide='ignore'):
+                s[f'{prefix}mean'] = np.where(valid, s[f'{prefix}mean'] + delta / count, s[f'{prefix}mean'])
+            s[f'{prefix}m2'] = np.where(valid, s[f'{prefix}m2'] + delta * (values - s[f'{prefix}mean']), s[f'{prefix}m2'])
+            s[f'{prefix}count'] = count
+
+    def _lagDate(self):
+        if self.lag_date is None:
+            self.lag_date = _firstLag([self.begin_date])
+        return self.lag_date
+
+    def portStat(self):
+        p, annl_year = self.port, self.annl_year
+        with np.errstate(invalid='ignore', divide='ignore'):
+            arr_si = p['total'] / self.n_days * annl_year
+            volatility = np.sqrt(p['m2'] / (p['count'] - 1)) * np.sqrt(annl_year)
+            stat_return = {}
+            stat_return["ARR_SI"] = arr_si
+            stat_return["ARR_CI"] = p['nav'] ** (annl_year / self.n_days) - 1
+            stat_return["Volatility"] = volatility
+            stat_return["Sharpe"] = arr_si / volatility
+            stat_return["Calmar"] = arr_si / p['max_dd']
+            stat_return["Win Rate"] = p['wins'] / self.n_days
+            stat_return["PL Ratio"] = p['win_sum'] / p['wins'] / -(p['loss_sum'] / p['losses'])
+            stat_return["Sortino"] = arr_si / (np.sqrt(p['downside'] / self.n_days) * np.sqrt(annl_year))
+        stat_return['MaxDD'] = p['max_dd']
+        stat_return['MaxDDStart'] = _dateLabels(p['max_dd_start'])
+        stat_return['MaxDDEnd'] = _dateLabels(p['max_dd_end'])
+        return pd.DataFrame(stat_return, index=self.portfolios)
+
+    def summaryMetrics(self):
+        s = self.ic
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ic_table = pd.DataFrame({
+                'IC': s['mean'],
+                'rankIC': s['rank_mean'],
+                'IR': s['mean'] / np.sqrt(s['m2'] / (s['count'] - 1)),
+                'rankIR': s['rank_mean'] / np.sqrt(s['rank_m2'] / (s['rank_count'] - 1)),
+                'begin_date': _dateLabels(np.full(len(self.targets), self.begin_date)),
+                'end_date': _dateLabels(np.full(len(self.targets), self.last_date)),
+            }, index=self.targets)
+        return ic_table.round(4).sort_index()
+
+    def save(self, file):
+        meta = {x: getattr(self, x) for x in ['factor_name', 'target_name', 'n_groups', 'n_top', 'annl_year',
+                                               'n_days', 'begin_date', 'lag_date', 'last_date', 'portfolios', 'targets']}
+        np.savez(file, meta=json.dumps(meta),
+                 **{f"port_{x}": v for x, v in self.port.items()},
+                 **{f"ic_{x}": v for x, v in self.ic.items()})
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file) as data:
+            meta = json.loads(str(data['meta']))
+            tracker = cls(meta['factor_name'], meta['target_name'], meta['n_groups'], meta['n_top'], meta['annl_year'])
+            for name, value in meta.items():
+                setattr(tracker, name, value)
+            tracker.port = {x: data[f"port_{x}"] for x in _portFields}
+            tracker.ic = {x: data[f"ic_{x}"] for x in _icFields}
+        return tracker
+
+
+def _firstLag(dates):
+    calendar = None if hasCalendar() else TradeCalendar.fromDates(dates)
+    return getLagDate(int(np.min(dates)), 1, calendar)
+
+
+def _dateLabels(dates):
+    return pd.to_datetime(pd.Series(dates).astype('int64').astype(str), format='%Y%m%d').dt.strftime('%Y-%m-%d').to_numpy()
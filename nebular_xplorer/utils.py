@@ -1,7 +1,11 @@
-import datetime
-from .log import Logger
+from .log import Logger, span, profiled
+from .calendar import getCalendar, hasCalendar, TradeCalendar, _isoDate
+from .cache import memoize
+import os
+import shutil
+import tempfile
+import numpy as np
 import polars as pl
-import pandas as pd
 
 factorSuffix = '__factor__'
 targetSuffix = '__target__'
@@ -10,16 +14,30 @@ dateSuffix = '__date__'
 codeSuffix = '__code__'
 
 
-def prepare(factors, targets, key_name=['date', 'code']):
+@profiled('prepare')
+def prepare(factors, targets, key_name=['date', 'code'], sink=None, chunk_days=None, compact=False):
+    if sink is None:
+        return memoize('prepare', lambda: _prepare(factors, targets, key_name, sink, chunk_days, compact),
+                       factors, targets, key_name=key_name, chunk_days=chunk_days, compact=compact)
+    return _prepare(factors, targets, key_name, sink, chunk_days, compact)
+
+
+def _prepare(factors, targets, key_name, sink, chunk_days, compact=False):
+    if sink is not None or chunk_days is not None or not (
+            isinstance(factors, pl.DataFrame) and isinstance(targets, pl.DataFrame)):
+        return _prepare_streaming(factors, targets, key_name, sink, chunk_days or 250, compact)
     factorName, _ = _check_raw_data(factors, key_name)
     targetName, _ = _check_raw_data(targets, key_name)
-    factor_table = factors.pivot(index=key_name, on=factorName)
-    target_table = targets.pivot(index=key_name, on=targetName)
+    with span('prepare.pivot') as s:
+        factor_table = factors.pivot(index=key_name, on=factorName)
+        target_table = targets.pivot(index=key_name, on=targetName)
+        s.record(factor_table)
     factor_table = factor_table.rename(
         {x: f"{x}{factorSuffix}" for x in factor_table.columns if x not in key_name})
     target_table = target_table.rename(
         {x: f"{x}{targetSuffix}" for x in target_table.columns if x not in key_name})
-    full_data = target_table.join(factor_table, on=key_name, how='left')
+    with span('prepare.join') as s:
+        full_data = s.record(target_table.join(factor_table, on=key_name, how='left'))
     dates = full_data[key_name[0]].unique().to_list()
     dates.sort()
     n_days = len(dates)
@@ -29,68 +47,399 @@ def prepare(factors, targets, key_name=['date', 'code']):
         f"\n    Nx full data prepared from {dates[0]} to {dates[-1]}.\n    Shape: {full_data.shape}\n    Days: {n_days} \n    Num of avg codes: {n_codes}")
     full_data = full_data.rename(
         {key_name[0]: f"{key_name[0]}{dateSuffix}", key_name[1]: f"{key_name[1]}{codeSuffix}"})
+    if compact:
+        full_data = compactLayout(full_data)
     return full_data
 
 
-def getReturnTable(full_data, factor_name=None, target_name=None, benchmarks=None, n_groups=10, n_top=[200, 1000]):
-    key_names_suf = [x for x in full_data.columns if x.endswith(
-        dateSuffix)]+[x for x in full_data.columns if x.endswith(codeSuffix)]
-    key_names = [x.replace(dateSuffix, '').replace(
-        codeSuffix, '') for x in key_names_suf]
-    if benchmarks is not None:
-        bmName, _ = _check_raw_data(benchmarks, key_names[:-1])
-        bm_table = benchmarks.pivot(index=key_names[:-1], on=bmName)
-        bm_table = bm_table.rename(
-            {x: f"{x}{benchmarkSuffix}" for x in bm_table.columns if x not in key_names[:-1]}).rename({key_names[0]: f"{key_names[0]}{dateSuffix}"})
+def _prepare_streaming(factors, targets, key_name, sink, chunk_days, compact=False):
+    temp_dir = tempfile.mkdtemp(prefix='nx-prepare-')
+    renames = {key_name[0]: f"{key_name[0]}{dateSuffix}",
+               key_name[1]: f"{key_name[1]}{codeSuffix}"}
+    writer = None
+    chunks = []
+    n_rows = 0
+    try:
+        with span('prepare.partition'):
+            targets, target_offsets = _partition(targets, key_name[0], os.path.join(temp_dir, 'targets.arrow'))
+            factors, factor_offsets = _partition(factors, key_name[0], os.path.join(temp_dir, 'factors.arrow'))
+        factorName, factorValue = _check_raw_data(factors, key_name)
+        targetName, targetValue = _check_raw_data(targets, key_name)
+        factor_names = _unique(factors, factorName)
+        target_names = _unique(targets, targetName)
+        dates = target_offsets[0]
+        for i in range(0, len(dates), chunk_days):
+            start, end = dates[i], dates[min(i + chunk_days, len(dates)) - 1]
+            with span('prepare.chunk', start=int(start)) as s:
+                target_table = _pivot_chunk(_date_range(targets, target_offsets, start, end),
+                                            key_name, targetName, targetValue, target_names, targetSuffix)
+                factor_table = _pivot_chunk(_date_range(factors, factor_offsets, start, end),
+                                            key_name, factorName, factorValue, factor_names, factorSuffix)
+                chunk = s.record(target_table.join(factor_table, on=key_name, how='left').rename(renames))
+                if compact:
+                    chunk = compactLayout(chunk)
+            n_rows += chunk.shape[0]
+            if sink is None:
+                chunks.append(chunk)
+            else:
+                with span('prepare.write') as s:
+                    writer = _write_chunk(writer, sink, s.record(chunk))
+    finally:
+        if writer is not None:
+            writer.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    logger = Logger('Prepare(nx)')
+    logger.info(
+        f"\n    Nx full data prepared from {dates[0]} to {dates[-1]}.\n    Shape: ({n_rows}, {len(key_name) + len(factor_names) + len(target_names)})\n    Days: {len(dates)} \n    Num of avg codes: {n_rows // len(dates)}")
+    if sink is None:
+        full_data = pl.concat(chunks, how='vertical')
+        if compact:
+            full_data = _setSorted(full_data)
+        return full_data
+    if _is_ipc(sink):
+        return pl.scan_ipc(sink)
+    return pl.scan_parquet(sink)
+
+
+def compactLayout(full_data, float_type=pl.Float32):
+    dateName, codeName = get_key_names(full_data)
+    factor_names, target_names = check_full_data(full_data)
+    schema = full_data.collect_schema()
+    code = pl.col(codeName)
+    if schema[codeName] == pl.String:
+        code = code.cast(pl.Categorical)
+    elif schema[codeName].is_integer():
+        code = code.cast(pl.Int32)
+    benchmark_names = [x for x in schema.names() if benchmarkSuffix in x]
+    full_data = full_data.with_columns(
+        pl.col(dateName).cast(pl.Int32),
+        code,
+        pl.col(factor_names + target_names + benchmark_names).cast(float_type),
+    ).sort(dateName, codeName)
+    return _setSorted(full_data)
+
+
+def _setSorted(full_data):
+    dateName, _ = get_key_names(full_data)
+    return full_data.with_columns(pl.col(dateName).set_sorted())
+
+
+def dateOffsets(full_data, date_name=None):
+    dateName = get_key_names(full_data)[0] if date_name is None else date_name
+    dates = full_data[dateName]
+    if not dates.is_sorted():
+        raise ValueError(f"{dateName} is not sorted, use compactLayout or sort by date first.")
+    dates = dates.to_numpy()
+    starts = np.flatnonzero(np.diff(dates, prepend=dates[:1] - 1))
+    return dates[starts], np.append(starts, len(dates))
+
+
+def dateSlice(full_data, date, offsets=None):
+    dates, bounds = dateOffsets(full_data) if offsets is None else offsets
+    i = np.searchsorted(dates, date)
+    if i == len(dates) or dates[i] != date:
+        return full_data.clear()
+    return full_data.slice(int(bounds[i]), int(bounds[i + 1] - bounds[i]))
+
+
+def saveFullData(full_data, file):
+    if isinstance(full_data, pl.LazyFrame):
+        full_data = full_data.collect()
+    full_data.write_ipc(str(file), compression='uncompressed')
+
+
+def loadFullData(file):
+    import pyarrow as pa
+    table = pa.ipc.open_file(pa.memory_map(str(file), 'r')).read_all()
+    full_data = pl.from_arrow(table, rechunk=False)
+    dateName, _ = get_key_names(full_data)
+    if full_data[dateName].is_sorted():
+        full_data = _setSorted(full_data)
+    return full_data
+
+
+def _scan(source):
+    if isinstance(source, pl.LazyFrame):
+        return source
+    if isinstance(source, pl.DataFrame):
+        return source.lazy()
+    source = str(source)
+    if _is_ipc(source):
+        return pl.scan_ipc(source)
+    return pl.scan_parquet(source)
+
+
+def _is_ipc(path):
+    return str(path).endswith(('.arrow', '.ipc', '.feather'))
+
+
+def _unique(lf, name):
+    return lf.select(pl.col(name).unique().sort()).collect(engine='streaming')[name].to_list()
+
+
+def _partition(source, date_name, file):
+    if isinstance(source, pl.DataFrame):
+        if not source[date_name].is_sorted():
+            source = source.sort(date_name, maintain_order=True)
+        return source.lazy(), dateOffsets(source, date_name)
+    source = _scan(source)
+    if source.select((pl.col(date_name).diff() < 0).any()).collect(engine='streaming').item():
+        source.sort(date_name, maintain_order=True).sink_ipc(file, compression='uncompressed')
+        source = pl.scan_ipc(file)
+    counts = source.group_by(date_name).len().sort(date_name).collect(engine='streaming')
+    return source, (counts[date_name].to_numpy(), np.append(0, np.cumsum(counts['len'].to_numpy())))
+
+
+def _date_range(source, offsets, start, end):
+    dates, bounds = offsets
+    lo, hi = np.searchsorted(dates, start, 'left'), np.searchsorted(dates, end, 'right')
+    return source.slice(int(bounds[lo]), int(bounds[hi] - bounds[lo])).collect()
+
+
+def _pivot_chunk(data, key_name, name, value, names, suffix):
+    table = data.pivot(on=name, on_columns=names, index=key_name, values=value, aggregate_function='first')
+    return table.rename({x: f"{x}{suffix}" for x in names})
+
+
+def _write_chunk(writer, sink, chunk):
+    import pyarrow as pa
+    table = chunk.to_arrow()
+    if writer is None:
+        if _is_ipc(sink):
+            writer = pa.ipc.new_file(str(sink), table.schema)
+        else:
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(str(sink), table.schema)
+    if _is_ipc(sink):
+        writer.write_table(table)
+    else:
+        writer.write_table(table, row_group_size=chunk.shape[0])
+    return writer
+
+
+@profiled('getReturnTable')
+def getReturnTable(full_data, factor_name=None, target_name=None, benchmarks=None, n_groups=10, n_top=[200, 1000], calendar=None):
+    return memoize('getReturnTable',
+                   lambda: _getReturnTable(full_data, factor_name, target_name, benchmarks, n_groups, n_top, calendar),
+                   full_data, benchmarks, _calendarDates(calendar), factor_name=factor_name,
+                   target_name=target_name, n_groups=n_groups, n_top=n_top)
+
+
+def _getReturnTable(full_data, factor_name, target_name, benchmarks, n_groups, n_top, calendar):
+    import pandas as pd
+    dateName, _ = get_key_names(full_data)
     factor_names, target_names = check_full_data(full_data)
     if factor_name is None:
         factor_name = factor_names[0]
-    else:
-        factor_name += factorSuffix
     if target_name is None:
         target_name = target_names[0]
-    else:
-        target_name += targetSuffix
-    data = full_data.select(key_names_suf + [factor_name, target_name])
-    labels = list(map(str, range(1, n_groups+1)))
-    labels = [f'G{n_groups}N{str(x).zfill(2)}' for x in labels]
-    data = data.with_columns([
-        pl.col(factor_name)
-        .qcut(n_groups, labels=labels, allow_duplicates=True)
-        .over(key_names_suf[0])
-        .alias('group'),
-        pl.col(factor_name)
-        .rank()
-        .over(key_names_suf[0])
-        .alias('rank')])
-    group_data = data.group_by('group', key_names_suf[0]).agg(
-        pl.col(target_name).mean().alias('mean_ret'))
-    group_data = group_data.pivot(
-        on='group', index=key_names_suf[0], maintain_order=True, sort_columns=True)
-    ls_data = data.group_by(key_names_suf[0]).agg([
-        pl.col(target_name)
-        .filter(pl.col('rank') >= pl.col('rank').count() - n_stocks)
-        .mean()
-        .alias(f'l_{n_stocks}') for n_stocks in n_top]+[
-        pl.col(target_name)
-        .filter(pl.col('rank') < n_stocks)
-        .mean()
-        .alias(f's_{n_stocks}') for n_stocks in n_top
-    ])
-    return_table = ls_data.join(group_data, on=key_names_suf[0]).join(
-        bm_table, on=key_names_suf[0], how='left')
-    return_table = return_table.to_pandas().set_index(
-        key_names_suf[0]).sort_index()
-    return_table.loc[getLagDate(return_table.index[0], 1)] = 0
+    long_table = getReturnTables(
+        full_data, [factor_name], [target_name], [n_groups], n_top)
+    with span('getReturnTable.pivot') as s:
+        return_table = s.record(long_table.pivot(
+            on='portfolio', index=dateName, values='return', sort_columns=True))
+    ls_names = [f'l_{n_stocks}' for n_stocks in n_top] + \
+        [f's_{n_stocks}' for n_stocks in n_top]
+    return_table = return_table.select(
+        [dateName] + ls_names + [x for x in return_table.columns if x not in ls_names + [dateName]])
+    if benchmarks is not None:
+        return_table = return_table.join(
+            _benchmark_table(benchmarks, dateName), on=dateName, how='left')
+    with span('getReturnTable.to_pandas') as s:
+        return_table = s.record(return_table.to_pandas().set_index(
+            dateName).sort_index())
+    if not hasCalendar(calendar):
+        calendar = TradeCalendar.fromDates(return_table.index.to_numpy())
+    return_table.loc[getLagDate(return_table.index[0], 1, calendar)] = 0
     return_table.index = pd.to_datetime(
         return_table.index, format='%Y%m%d')
     return_table.sort_index(inplace=True)
     return return_table
 
 
+@profiled('getReturnTables')
+def getReturnTables(full_data, factor_names=None, target_names=None, n_groups=[10], n_top=[200, 1000]):
+    from .stat import _dateBlocks
+    dateName, _ = get_key_names(full_data)
+    all_factors, all_targets = check_full_data(full_data)
+    factor_names = all_factors if factor_names is None else [
+        _with_suffix(x, factorSuffix) for x in factor_names]
+    target_names = all_targets if target_names is None else [
+        _with_suffix(x, targetSuffix) for x in target_names]
+    with span('getReturnTables.select') as s:
+        data = s.record(full_data.lazy().select(
+            dateName,
+            *[pl.col(x).cast(pl.Float64).fill_nan(None).alias(f"{x}|factor") for x in factor_names],
+            *[pl.col(x).cast(pl.Float64).alias(f"{x}|target") for x in target_names],
+            *[pl.col(x).cast(pl.Float64).is_nan().fill_null(False).alias(f"{x}|nan") for x in target_names],
+        ).sort(dateName, maintain_order=True).collect())
+    dates, bounds = dateOffsets(data, dateName)
+    n_factors, n_targets = len(factor_names), len(target_names)
+    portfolios = [x for n in n_groups for x in _group_labels(n)] + \
+        [f'l_{n_stocks}' for n_stocks in n_top] + [f's_{n_stocks}' for n_stocks in n_top]
+    values = data.drop(dateName).cast(pl.Float64).to_numpy()
+    sums = np.zeros((len(dates), n_factors, len(portfolios), 3 * n_targets + 1))
+    with span('getReturnTables.agg'):
+        for start, end, block in _dateBlocks(values, bounds):
+            target, nan = block[..., n_factors:n_factors + n_targets], block[..., n_factors + n_targets:] == 1
+            weights = np.concatenate([np.nan_to_num(target, nan=0.0), ~np.isnan(target) | nan, nan],
+                                     axis=-1, dtype=np.float64)
+            sums[start:end] = _portfolioSums(block[..., :n_factors], weights, n_groups, n_top)
+    return _returnLong(sums, data[dateName].gather(bounds[:-1]), factor_names, target_names, portfolios, len(n_top))
+
+
+def _portfolioSums(factors, weights, n_groups, n_top):
+    from .stat import _rankIndex
+    x = np.ascontiguousarray(factors.swapaxes(-1, -2))
+    n_dates, n_factors, n_codes = x.shape
+    count = (~np.isnan(x)).sum(axis=-1, keepdims=True)
+    order, starts, ends, _ = _rankIndex(x)
+    pos = np.arange(n_codes)
+    ends = np.broadcast_to(pos, x.shape) if ends is None else ends
+    ordered = np.take_along_axis(x, order, axis=-1)
+    ranks = np.where(pos < count, pos + 1.0 if starts is None else (starts + ends) / 2 + 1, np.nan)
+    lo, hi = [], []
+    for n in n_groups:
+        position = np.arange(1, n) / n * (count - 1).clip(min=0)
+        lower = np.floor(position).astype(np.intp)
+        upper = np.ceil(position).astype(np.intp)
+        lower_value, upper_value = np.take_along_axis(ordered, lower, -1), np.take_along_axis(ordered, upper, -1)
+        breaks = lower_value + (upper_value - lower_value) * (position % 1)
+        cuts = np.where(breaks < upper_value, np.take_along_axis(ends, lower, -1),
+                        np.take_along_axis(ends, upper, -1)) + 1
+        cuts = np.concatenate([np.zeros_like(count), np.minimum(cuts, count), count], axis=-1)
+        lo.append(cuts[..., :-1])
+        hi.append(cuts[..., 1:])
+    with np.errstate(invalid='ignore'):
+        for n_stocks in n_top:
+            lo.append(count - np.where(count >= n_stocks, (ranks >= count - n_stocks).sum(axis=-1, keepdims=True), 0))
+            hi.append(count)
+        for n_stocks in n_top:
+            lo.append(np.zeros_like(count))
+            hi.append((ranks < n_stocks).sum(axis=-1, keepdims=True))
+    lo, hi = np.concatenate(lo, axis=-1), np.concatenate(hi, axis=-1)
+    rows = (order + (np.arange(n_dates) * n_codes)[:, None, None]).reshape(-1)
+    ordered = np.zeros((weights.shape[-1], rows.size + 1))
+    for i, column in enumerate(np.ascontiguousarray(weights.reshape(-1, weights.shape[-1]).T)):
+        ordered[i, :-1] = column[rows]
+    offset = (np.arange(n_dates * n_factors) * n_codes).reshape(n_dates, n_factors, 1)
+    indices = np.stack([lo + offset, hi + offset], axis=-1).reshape(-1)
+    sums = np.add.reduceat(ordered, indices, axis=1)[:, ::2].T
+    size = (hi - lo).reshape(-1, 1)
+    sums[size[:, 0] <= 0] = 0.0
+    return np.concatenate([sums, size], axis=-1).reshape(n_dates, n_factors, lo.shape[-1], -1)
+
+
+def _returnLong(sums, dates, factor_names, target_names, portfolios, n_ls):
+    n_targets = len(target_names)
+    labels = [[x.replace(factorSuffix, '') for x in factor_names],
+              [x.replace(targetSuffix, '') for x in target_names], portfolios]
+    orders = [np.argsort(x, kind='stable') for x in labels]
+    sums = sums[:, orders[0]][:, :, orders[2]]
+    total, count, nan = sums[..., :n_targets], sums[..., n_targets:2 * n_targets], sums[..., 2 * n_targets:-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.where(nan > 0, np.nan, total / count)[..., orders[1]].transpose(1, 3, 2, 0)
+    shape = returns.shape
+    ls = (np.arange(len(portfolios)) >= len(portfolios) - 2 * n_ls)[orders[2]]
+    keep = (np.broadcast_to(sums[..., -1].transpose(1, 2, 0)[:, None], shape) > 0) | ls[None, None, :, None]
+    codes = np.nonzero(keep)
+    return pl.DataFrame([
+        *[pl.Series(name, np.array(x)[order]).gather(code)
+          for name, x, order, code in zip(['factor', 'target', 'portfolio'], labels, orders, codes)],
+        dates.gather(codes[3]),
+        pl.Series('return', returns[keep]),
+        pl.Series('count', count[..., orders[1]].transpose(1, 3, 2, 0)[keep]),
+    ]).select(pl.exclude('return', 'count'), pl.when(pl.col('count') > 0).then(pl.col('return')).alias('return'))
+
+
+@profiled('getTurnover')
+def getTurnover(full_data, factor_name=None, n_groups=10, n_top=[200, 1000]):
+    import pandas as pd
+    dateName, codeName = get_key_names(full_data)
+    factor_names, _ = check_full_data(full_data)
+    factor_name = factor_names[0] if factor_name is None else _with_suffix(factor_name, factorSuffix)
+    data = full_data.lazy().select(dateName, codeName, factor_name).with_columns(
+        _group_expr(factor_name, n_groups, dateName).alias('group'),
+        *[x.alias(x.meta.output_name().replace(factor_name, '')) for x in _rank_exprs(factor_name, dateName)],
+        pl.col(dateName).rank('dense').alias('t'),
+    ).sort(codeName, dateName).with_columns(
+        pl.col('group', '__rank', '__count', 't').shift(1).over(codeName).name.prefix('prev'),
+    ).with_columns((pl.col('prevt') == pl.col('t') - 1).fill_null(False).alias('held'))
+    rank, count = pl.col('__rank'), pl.col('__count')
+    prev_rank, prev_count, held = pl.col('prev__rank'), pl.col('prev__count'), pl.col('held')
+    members = []
+    for n_stocks in n_top:
+        members += [(f'l_{n_stocks}', rank >= count - n_stocks, prev_rank >= prev_count - n_stocks),
+                    (f's_{n_stocks}', rank < n_stocks, prev_rank < n_stocks)]
+    ls_data = data.group_by(dateName, 't').agg([
+        x for name, now, prev in members for x in [
+            now.sum().alias(f'{name}|size'),
+            (now & prev & held).sum().alias(f'{name}|overlap')]])
+    ls_data = pl.concat([ls_data.select(
+        dateName, 't', pl.lit(name).alias('portfolio'),
+        pl.col(f'{name}|size').alias('size'), pl.col(f'{name}|overlap').alias('overlap'),
+    ) for name, _, _ in members], how='vertical')
+    group_data = data.drop_nulls('group').group_by(dateName, 't', 'group').agg(
+        pl.len().alias('size'),
+        (held & (pl.col('prevgroup') == pl.col('group'))).sum().alias('overlap'),
+    ).rename({'group': 'portfolio'})
+    turnover = pl.concat([ls_data, group_data], how='vertical_relaxed').sort('portfolio', 't').with_columns(
+        pl.col('size', 'overlap').cast(pl.Float64),
+        pl.col('size').shift(1).over('portfolio').cast(pl.Float64).alias('prev_size'),
+        (pl.col('t').shift(1).over('portfolio') == pl.col('t') - 1).alias('consecutive'),
+    ).with_columns(
+        pl.when(pl.col('consecutive')).then(0.5 * (
+            pl.col('overlap') * (1 / pl.col('size') - 1 / pl.col('prev_size')).abs()
+            + (pl.col('size') - pl.col('overlap')) / pl.col('size')
+            + (pl.col('prev_size') - pl.col('overlap')) / pl.col('prev_size'))).alias('turnover')
+    ).collect().pivot(on='portfolio', index=dateName, values='turnover', sort_columns=True)
+    ls_names = [name for name, _, _ in members]
+    turnover = turnover.select(
+        [dateName] + ls_names + [x for x in turnover.columns if x not in ls_names + [dateName]])
+    turnover = turnover.to_pandas().set_index(dateName).sort_index()
+    turnover.index = pd.to_datetime(turnover.index, format='%Y%m%d')
+    return turnover
+
+
+def netReturnTable(return_table, turnover, cost=0.0015):
+    turnover = turnover.reindex(index=return_table.index, columns=return_table.columns).fillna(0)
+    costs = cost(turnover) if callable(cost) else turnover * cost
+    return return_table - costs
+
+
+def _group_expr(factor_name, n_groups, dateName):
+    return (pl.col(factor_name)
+            .qcut(n_groups, labels=_group_labels(n_groups), allow_duplicates=True)
+            .cast(pl.String)
+            .over(dateName)
+            .alias(f"{factor_name}__G{n_groups}"))
+
+
+def _rank_exprs(factor_name, dateName):
+    return [pl.col(factor_name).rank().over(dateName).alias(f"{factor_name}__rank"),
+            pl.col(factor_name).count().over(dateName).alias(f"{factor_name}__count")]
+
+
+def _group_labels(n_groups):
+    return [f'G{n_groups}N{str(x).zfill(2)}' for x in range(1, n_groups+1)]
+
+
+def _with_suffix(name, suffix):
+    return name if name.endswith(suffix) else f"{name}{suffix}"
+
+
+def _benchmark_table(benchmarks, dateName):
+    key_name = [dateName.replace(dateSuffix, '')]
+    bmName, _ = _check_raw_data(benchmarks, key_name)
+    bm_table = benchmarks.pivot(index=key_name, on=bmName)
+    bm_table = bm_table.rename(
+        {x: f"{x}{benchmarkSuffix}" for x in bm_table.columns if x not in key_name}).rename({key_name[0]: dateName})
+    return bm_table
+
+
 def _check_raw_data(df: pl.DataFrame, key_name: list) -> tuple:
-    col_names = df.columns
     schema = df.collect_schema()
+    col_names = schema.names()
     assert len(col_names) - \
         len(
             key_name) == 2, f"Expected less than 4 columns, got {len(col_names)}."
@@ -106,32 +455,28 @@ def _check_raw_data(df: pl.DataFrame, key_name: list) -> tuple:
     return colName, colValue
 
 
-def check_full_data(full_data: pl.DataFrame) -> tuple:
-    factor_names = [x for x in full_data.columns if factorSuffix in x]
-    target_names = [x for x in full_data.columns if targetSuffix in x]
-    return factor_names, target_names
+def get_key_names(full_data: pl.DataFrame) -> tuple:
+    columns = full_data.collect_schema().names()
+    dateName = [x for x in columns if x.endswith(dateSuffix)][0]
+    codeName = [x for x in columns if x.endswith(codeSuffix)][0]
+    return dateName, codeName
 
 
-def getLagDate(date, left_lag=1):
-    date = int(str(date).replace("-", ""))
-    fullTradeDates = getDates()
-    idx = fullTradeDates.index(date)
-    return fullTradeDates[idx-left_lag]
+def check_full_data(full_data: pl.DataFrame) -> tuple:
+    columns = full_data.collect_schema().names()
+    factor_names = [x for x in columns if factorSuffix in x]
+    target_names = [x for x in columns if targetSuffix in x]
+    return factor_names, target_names
 
 
-def getDates(start_date=19990909, end_date=None):
-    start_date = datetime.datetime.strptime(str(start_date), "%Y%m%d")
+def getLagDate(date, left_lag=1, calendar=None):
+    day, margin = np.datetime64(_isoDate(date)), np.timedelta64((abs(left_lag) // 5 + 2) * 7, 'D')
+    return int(getCalendar(calendar, day - margin, day + margin).shift(date, -left_lag))
 
-    if end_date:
-        end_date = datetime.datetime.strptime(str(end_date), "%Y%m%d")
-    else:
-        end_date = datetime.datetime.now()
 
-    date_list = []
-    current_date = start_date
-    while current_date <= end_date:
-        date_list.append(int(current_date.strftime("%Y%m%d")))
-        current_date += datetime.timedelta(days=1)
-    return date_list
+def _calendarDates(calendar):
+    return getCalendar(calendar).dates if hasCalendar(calendar) else None
 
 
+def getDates(start_date=19990909, end_date=None, calendar=None):
+    return getCalendar(calendar, start_date, end_date).range(start_date, end_date).tolist()
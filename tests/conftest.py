@@ -0,0 +1,43 @@
+import os
+import sys
+
+import polars as pl
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import nebular_xplorer as nx
+from benchmarks import synthetic
+
+
+@pytest.fixture(autouse=True)
+def _isolated():
+    nx.cache.disable()
+    nx.log.disableProfiling()
+    yield
+    nx.cache.disable()
+    nx.log.disableProfiling()
+
+
+@pytest.fixture(scope='session')
+def raw_data():
+    return synthetic.generate(n_codes=60, n_days=40, n_factors=3, n_benchmarks=2, missing=0.05, seed=1)
+
+
+@pytest.fixture(scope='session')
+def full_data(raw_data):
+    factors, targets, _ = raw_data
+    return nx.utils.prepare(factors, targets)
+
+
+@pytest.fixture(scope='session')
+def benchmarks(raw_data):
+    return raw_data[2]
+
+
+@pytest.fixture(scope='session')
+def sparse_data(raw_data):
+    factors, targets, _ = raw_data
+    targets = targets.with_columns(
+        pl.when(pl.col('code') % 7 == pl.col('date') % 7).then(None).otherwise(pl.col('target_value'))
+        .alias('target_value'))
+    return nx.utils.prepare(factors, targets)
@@ -0,0 +1,79 @@
+import json
+import os
+
+import pandas as pd
+import polars as pl
+import pytest
+
+from nebular_xplorer import batch
+
+
+@pytest.fixture
+def inputs(raw_data, tmp_path):
+    factors, targets, benchmarks = raw_data
+    os.makedirs(tmp_path / 'factors')
+    factors.filter(pl.col('factor_name') != 'factor3').write_parquet(tmp_path / 'factors' / 'a.parquet')
+    factors.filter(pl.col('factor_name') == 'factor3').write_ipc(tmp_path / 'factors' / 'b.arrow')
+    targets.write_parquet(tmp_path / 'targets.parquet')
+    benchmarks.write_parquet(tmp_path / 'benchmarks.parquet')
+    return (str(tmp_path / 'factors'), str(tmp_path / 'targets.parquet'), str(tmp_path / 'benchmarks.parquet'),
+            str(tmp_path / 'reports'))
+
+
+def _mtimes(output):
+    reports = ['a.parquet/factor1.html', 'a.parquet/factor2.html', 'b.arrow/factor3.html']
+    return {x: os.path.getmtime(os.path.join(output, x)) for x in reports}
+
+
+def test_run_and_resume(inputs, full_data, monkeypatch):
+    factors, targets, benchmarks, output = inputs
+    monkeypatch.setattr(batch, '_headless', lambda: pytest.fail('serial run switched the matplotlib backend'))
+    table, failed = batch.run(factors, targets, output, benchmarks, n_top=[10], max_workers=1, dpi=20)
+    assert failed == [] and table['IR'].is_monotonic_decreasing and batch._shared == {}
+    assert table['IR Rank'].tolist() == [1.0, 2.0, 3.0]
+    assert table.columns.tolist() == batch.summaryColumns + ['IR Rank', 'Sharpe Rank']
+    pd.testing.assert_frame_equal(pd.read_csv(os.path.join(output, 'summary.csv')), table, check_dtype=False)
+    _, summary = batch.factorReport(full_data, 'factor1', n_top=[10], dpi=20)
+    row = table.set_index('factor').loc['factor1']
+    for name in ['IC', 'IR', 'ARR', 'Sharpe', 'MaxDD', 'Turnover', 'Net Sharpe']:
+        assert row[name] == pytest.approx(summary[name])
+    with open(os.path.join(output, 'a.parquet', 'summary.json')) as f:
+        assert [x['factor'] for x in json.load(f)['rows']] == ['factor1', 'factor2']
+
+    mtimes = _mtimes(output)
+    table, _ = batch.run(factors, targets, output, benchmarks, n_top=[10], max_workers=1, dpi=20)
+    assert _mtimes(output) == mtimes and len(table) == 3
+    os.utime(os.path.join(factors, 'b.arrow'))
+    batch.run(factors, targets, output, benchmarks, n_top=[10], max_workers=1, dpi=20)
+    rerun = _mtimes(output)
+    assert rerun['a.parquet/factor1.html'] == mtimes['a.parquet/factor1.html']
+    assert rerun['b.arrow/factor3.html'] > mtimes['b.arrow/factor3.html']
+    batch.run(factors, targets, output, benchmarks, n_top=[10], max_workers=1, dpi=20, cost=0.003)
+    assert all(_mtimes(output)[x] > rerun[x] for x in rerun)
+
+
+def test_failed_file_and_cli(inputs, capsys):
+    factors, targets, benchmarks, output = inputs
+    with open(os.path.join(factors, 'c.parquet'), 'w') as f:
+        f.write('not parquet')
+    code = batch.main([factors, '--targets', targets, '--benchmarks', benchmarks, '--output', output,
+                       '--n-top', '10', '--workers', '2', '--dpi', '20'])
+    assert code == 1
+    table = pd.read_csv(os.path.join(output, 'summary.csv'))
+    assert sorted(table['factor']) == ['factor1', 'factor2', 'factor3']
+    assert 'factor3' in capsys.readouterr().out
+    assert os.path.exists(os.path.join(output, '.shared', 'targets.arrow'))
+    assert not os.path.exists(os.path.join(output, 'c.parquet', 'summary.json'))
+
+
+def test_same_stem_files(inputs, raw_data, tmp_path):
+    factors, targets, benchmarks, output = inputs
+    raw_data[0].filter(pl.col('factor_name') == 'factor3').write_ipc(os.path.join(factors, 'a.arrow'))
+    table, failed = batch.run(factors, targets, output, benchmarks, n_top=[10], max_workers=1, dpi=20)
+    assert failed == [] and len(table) == 4
+    assert sorted(table['report']) == ['a.arrow/factor3.html', 'a.parquet/factor1.html', 'a.parquet/factor2.html',
+                                       'b.arrow/factor3.html']
+    os.makedirs(tmp_path / 'more')
+    raw_data[0].write_parquet(tmp_path / 'more' / 'a.parquet')
+    with pytest.raises(ValueError, match='a.parquet'):
+        batch.run(str(tmp_path / '*' / 'a.parquet'), targets, output, benchmarks, n_top=[10], max_workers=1)
@@ -0,0 +1,41 @@
+import polars as pl
+from polars.testing import assert_frame_equal
+
+import nebular_xplorer as nx
+from benchmarks import run, synthetic
+
+
+def test_generate_is_deterministic():
+    first = synthetic.generate(n_codes=30, n_days=12, n_factors=2, seed=4)
+    for expected, frame in zip(first, synthetic.generate(n_codes=30, n_days=12, n_factors=2, seed=4)):
+        assert_frame_equal(frame, expected)
+    other = synthetic.generate(n_codes=30, n_days=12, n_factors=2, seed=5)
+    assert not first[0].equals(other[0])
+    assert first[0].columns == ['date', 'code', 'factor_value', 'factor_name']
+    assert first[1].columns == ['date', 'code', 'target_value', 'target_name']
+    assert first[2].columns == ['date', 'name', 'return_value']
+
+
+def test_chunked_write_matches_generate(tmp_path):
+    factors, targets, benchmarks = synthetic.generate(n_codes=20, n_days=9, n_factors=2, n_benchmarks=2, seed=1)
+    files = synthetic.write(tmp_path, n_codes=20, n_days=9, n_factors=2, n_benchmarks=2, seed=1, chunk_days=4)
+    for expected, file in zip([factors, targets, benchmarks], files):
+        assert_frame_equal(pl.read_parquet(file), expected)
+
+
+def test_factors_carry_signal():
+    factors, targets, _ = synthetic.generate(n_codes=300, n_days=60, n_factors=3, seed=2)
+    summary = nx.stat.summaryMetrics(nx.stat.icMatrix(nx.utils.prepare(factors, targets)))
+    ic = summary.xs('1d_forward_return', level='target')['IC']
+    assert ic['factor3'] > 0.1 and ic['factor2'] < -0.05
+
+
+def test_compare_flags_regressions():
+    baseline = {'stages': {'prepare': {'time': 1.0, 'peak_rss': 2**30},
+                           'metrics': {'time': 0.01, 'peak_rss': 2**30}}}
+    results = {'stages': {'prepare': {'time': 1.5, 'peak_rss': 2**30},
+                          'metrics': {'time': 0.03, 'peak_rss': 2**30},
+                          'report': {'time': 9.0}}}
+    rows, regressions = run.compare(results, baseline, tolerance=0.2)
+    assert len(rows) == 4
+    assert [(x[0], x[1]) for x in regressions] == [('prepare', 'time')]
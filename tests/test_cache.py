@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+import polars as pl
+from polars.testing import assert_frame_equal
+
+import nebular_xplorer as nx
+from nebular_xplorer.cache import Cache
+
+
+def test_cached_round_trip(tmp_path):
+    cache = Cache(tmp_path)
+    calls = []
+    frame = pl.DataFrame({'date': [20240102, 20240103], 'value': [1.5, None]})
+    table = pd.DataFrame({'a': [0.1, np.nan]}, index=pd.to_datetime(['2024-01-02', '2024-01-03']))
+    for data in [frame, table]:
+        key = cache.key('test', data, n=1)
+        assert key == cache.key('test', data, n=1) != cache.key('test', data, n=2)
+        for _ in range(2):
+            result = cache.cached(key, lambda: calls.append(1) or data)
+        assert len(calls) == (1 if data is frame else 2)
+        if data is frame:
+            assert_frame_equal(result, frame)
+        else:
+            pd.testing.assert_frame_equal(result, table)
+    assert cache.key('test', frame.with_columns(pl.col('value').fill_null(0))) != cache.key('test', frame)
+
+
+def test_evict_keeps_new_entry(tmp_path):
+    cache = Cache(tmp_path, max_bytes=1)
+    frame = pl.DataFrame({'value': np.arange(1000)})
+    assert_frame_equal(cache.put('first', frame), frame)
+    os.utime(cache.path('first'), (0, 0))
+    assert_frame_equal(cache.cached('second', lambda: frame), frame)
+    assert not os.path.exists(cache.path('first'))
+    assert os.path.exists(cache.path('second'))
+
+
+def test_small_cache_return_table(tmp_path, full_data):
+    expected = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+    for _ in range(2):
+        with nx.cache.caching(tmp_path, max_bytes=1000):
+            return_table = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+        pd.testing.assert_frame_equal(return_table, expected)
+    with nx.cache.caching(tmp_path):
+        nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+        return_table = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+    pd.testing.assert_frame_equal(return_table, expected)
+
+
+def test_key_tracks_mutation_version_and_calendar(tmp_path, monkeypatch, full_data):
+    cache = Cache(tmp_path)
+    frame = pl.DataFrame({'value': [1.0, 2.0]})
+    key = cache.key('test', frame)
+    frame.replace_column(0, pl.Series('value', [1.0, 3.0]))
+    assert cache.key('test', frame) != key
+    frame.insert_column(1, pl.Series('other', [0, 0]))
+    assert cache.key('test', frame) != key
+    key = cache.key('test', frame)
+    monkeypatch.setattr(nx.cache, 'cacheVersion', nx.cache.cacheVersion + 1)
+    assert cache.key('test', frame) != key
+
+    with nx.cache.caching(tmp_path):
+        expected = nx.stat.metrics(full_data, 'factor1')
+        data = full_data.clone()
+        nx.stat.metrics(data, 'factor1')
+        data.replace_column(data.get_column_index('factor1__factor__'), -data['factor1__factor__'])
+        pd.testing.assert_frame_equal(nx.stat.metrics(data, 'factor1'), -expected)
+
+        dates = np.unique(full_data['date__date__'].to_numpy())
+        monkeypatch.setattr(nx.calendar, '_calendars', {})
+        first = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+        nx.calendar.setCalendar(np.append(19991220, dates))
+        second = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+    assert first.index[0] != second.index[0]
+    assert second.index[0] == pd.Timestamp('1999-12-20')
+
+
+def test_concurrent_removal(tmp_path, monkeypatch):
+    cache = Cache(tmp_path, max_bytes=1)
+    frame = pl.DataFrame({'value': np.arange(1000)})
+    cache.put('first', frame)
+    monkeypatch.setattr(nx.cache.os, 'utime', lambda path: os.remove(path) or os.utime(path))
+    assert cache.get('first') is None
+    monkeypatch.undo()
+    cache.put('first', frame)
+    files = [cache.path('missing'), cache.path('first')]
+    monkeypatch.setattr(nx.cache.glob, 'glob', lambda pattern: files)
+    cache.evict()
+    assert not os.path.exists(cache.path('first'))
+    cache.put('second', frame)
+    remove = os.remove
+    monkeypatch.setattr(nx.cache.os, 'remove', lambda path: remove(path) or remove(path))
+    files = [cache.path('second')]
+    cache.evict()
+    assert not os.path.exists(cache.path('second'))
@@ -0,0 +1,81 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import nebular_xplorer as nx
+from nebular_xplorer.calendar import TradeCalendar, getCalendar, setCalendar, toIntDate, toDatetime
+
+
+@pytest.fixture(autouse=True)
+def _calendars(monkeypatch):
+    monkeypatch.setattr(nx.calendar, '_calendars', {})
+    monkeypatch.delenv(nx.calendar.calendarEnv, raising=False)
+
+
+def test_weekdays():
+    calendar = TradeCalendar.weekdays(20240101, 20240114)
+    assert calendar.dates.tolist() == [20240101, 20240102, 20240103, 20240104, 20240105,
+                                       20240108, 20240109, 20240110, 20240111, 20240112]
+    assert 20240106 not in calendar and 20240108 in calendar
+    assert calendar.isTradeDate([20240105, 20240106, 20240201]).tolist() == [True, False, False]
+
+
+def test_shift_and_range():
+    calendar = TradeCalendar([20240103, 20240101, 20240105, 20240110, 20240103])
+    assert calendar.dates.tolist() == [20240101, 20240103, 20240105, 20240110]
+    assert calendar.shift(20240103, 1) == 20240105
+    assert calendar.shift(20240104, 1) == 20240105
+    assert calendar.shift(20240104, -1) == 20240103
+    assert calendar.prev(20240110) == 20240105 and calendar.next(20240101) == 20240103
+    assert calendar.shift([20240101, 20240103], 2).tolist() == [20240105, 20240110]
+    assert calendar.range(20240102, 20240105).tolist() == [20240103, 20240105]
+    with pytest.raises(ValueError):
+        calendar.shift(20240110, 1)
+
+
+def test_date_conversions():
+    dates = ['2024-02-29', '1999-12-31']
+    assert toIntDate(dates).tolist() == [20240229, 19991231]
+    assert toIntDate(np.array(dates, dtype='datetime64[D]')).tolist() == [20240229, 19991231]
+    assert toIntDate(pd.to_datetime(dates)).tolist() == [20240229, 19991231]
+    assert toDatetime([20240229, 19991231]).tolist() == [datetime.date(2024, 2, 29), datetime.date(1999, 12, 31)]
+
+
+def test_default_calendar_follows_requested_range():
+    assert getCalendar() is not getCalendar()
+    assert nx.calendar._calendars == {}
+    assert nx.utils.getDates(20240101, 20240107) == [20240101, 20240102, 20240103, 20240104, 20240105]
+    today = int(datetime.date.today().strftime('%Y%m%d'))
+    if np.is_busday(np.datetime64('today')):
+        assert nx.utils.getDates(today)[-1] == today
+    assert nx.utils.getLagDate(20240108) == 20240105
+    assert nx.utils.getLagDate(20240108, 11) == 20231222
+    assert nx.utils.getLagDate(20240105, -1) == 20240108
+
+
+def test_configured_calendar(tmp_path, monkeypatch):
+    dates = [20240102, 20240104, 20240108]
+    np.save(tmp_path / 'calendar.npy', np.array(dates))
+    monkeypatch.setenv(nx.calendar.calendarEnv, str(tmp_path / 'calendar.npy'))
+    assert nx.utils.getLagDate(20240108) == 20240104
+    setCalendar([20240103, 20240108])
+    assert nx.utils.getLagDate(20240108) == 20240103
+    assert nx.utils.getLagDate(20240108, 1, TradeCalendar(dates)) == 20240104
+
+
+def test_from_dates_uses_data_frequency():
+    assert TradeCalendar.fromDates([20240108, 20240109, 20240110]).dates[0] == 20240105
+    monthly = TradeCalendar.fromDates([20240131, 20240229, 20240329, 20240430])
+    assert 20231227 <= monthly.dates[0] <= 20240102
+
+
+def test_return_table_lag_from_data(full_data, raw_data):
+    dates = np.sort(raw_data[1]['date'].unique().to_numpy())
+    return_table = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return')
+    assert return_table.index[0] == pd.Timestamp(str(TradeCalendar.fromDates(dates).dates[0]))
+    assert return_table.index[0] < pd.Timestamp(str(dates[0]))
+    setCalendar([20000101] + dates.tolist())
+    return_table = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return')
+    assert return_table.index[0] == pd.Timestamp('2000-01-01')
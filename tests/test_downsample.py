@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nebular_xplorer.downsample import downsample, lttbIndices, minmaxIndices
+
+
+@pytest.fixture(scope='module')
+def nav():
+    rng = np.random.default_rng(13)
+    values = np.cumprod(1 + rng.normal(0, 0.01, 5000))
+    values[1234] *= 1.5
+    values[3210] *= 0.5
+    return values
+
+
+def test_minmax_keeps_bucket_extrema(nav):
+    indices = minmaxIndices(nav, 100)
+    assert indices[0] == 0 and indices[-1] == len(nav) - 1
+    assert len(indices) <= 2 * 100 + 2 and (np.diff(indices) > 0).all()
+    for bucket in np.array_split(np.arange(len(nav)), 100):
+        assert nav[bucket].argmin() + bucket[0] in indices
+        assert nav[bucket].argmax() + bucket[0] in indices
+    with_nan = nav.copy()
+    with_nan[:60] = np.nan
+    assert np.nanargmin(with_nan) in minmaxIndices(with_nan, 100)
+    np.testing.assert_array_equal(minmaxIndices(nav[:150], 100), np.arange(150))
+
+
+def test_lttb_one_point_per_bucket(nav):
+    indices = lttbIndices(nav, 300)
+    edges = np.linspace(1, len(nav) - 1, 299).astype(np.intp)
+    assert len(indices) == 300 and indices[0] == 0 and indices[-1] == len(nav) - 1
+    assert ((indices[1:-1] >= edges[:-1]) & (indices[1:-1] < edges[1:])).all()
+    assert 1234 in indices and 3210 in indices
+    line = np.linspace(0, 1, 1000)
+    np.testing.assert_allclose(np.interp(np.arange(1000), lttbIndices(line, 50), line[lttbIndices(line, 50)]), line)
+    with_nan = nav.copy()
+    with_nan[10] = np.nan
+    np.testing.assert_array_equal(lttbIndices(with_nan, 300), minmaxIndices(with_nan, 150))
+
+
+def test_downsample_frames(nav):
+    index = pd.bdate_range('2000-01-03', periods=len(nav))
+    frame = pd.DataFrame({'a': nav, 'b': nav[::-1]}, index=index)
+    result = downsample(frame, 200)
+    expected = np.union1d(minmaxIndices(nav, 100), minmaxIndices(nav[::-1], 100))
+    pd.testing.assert_frame_equal(result, frame.iloc[expected])
+    series = downsample(frame['a'], 200, 'lttb')
+    pd.testing.assert_series_equal(series, frame['a'].iloc[lttbIndices(nav, 200)])
+    assert downsample(frame, None) is frame and downsample(frame, len(frame)) is frame
+    with pytest.raises(ValueError):
+        downsample(frame, 100, 'mean')
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import nebular_xplorer as nx
+
+
+def _reference_maxdd(nav_table):
+    max_values = np.maximum.accumulate(nav_table)
+    drawdowns = 1 - nav_table / max_values
+    max_dd_end = drawdowns.idxmax()
+    return drawdowns.max(), max_dd_end.dt.strftime("%Y-%m-%d"), drawdowns
+
+
+def _reference_dd_details(return_table):
+    nav = (1 + return_table.iloc[:, :1]).cumprod()
+    drawdowns = 1 - nav / np.maximum.accumulate(nav)
+    drawdowns.columns = [f'{x}_dd' for x in drawdowns.columns]
+    value_name = drawdowns.columns[0]
+    split_positions = [drawdowns.index.get_loc(x) for x in drawdowns.index[drawdowns[value_name] == 0]]
+    split_positions = [-1] + split_positions + [len(drawdowns)]
+    dfs = [drawdowns.iloc[split_positions[i]:split_positions[i + 1] + 1] for i in range(len(split_positions) - 1)]
+    dfs = [x for x in dfs if len(x[x.values != 0]) > 0]
+    return sorted(dfs, key=lambda x: x[value_name].max(), reverse=True)
+
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range('2020-01-01', periods=300)
+    table = pd.DataFrame(rng.normal(0.0005, 0.01, (300, 4)), index=index, columns=['a', 'b', 'c', 'd'])
+    table.iloc[5:9, 1] = np.nan
+    table.iloc[-20:, 2] = -0.01
+    table['d'] = 0.001
+    return table
+
+
+def test_drawdowns_match_reference(returns):
+    nav = nx.stat.cal_nav(returns.fillna(0))
+    max_dd, _, max_dd_end, drawdowns = nx.stat.calculate_maxdd(nav)
+    expected_dd, expected_end, expected = _reference_maxdd(nav)
+    np.testing.assert_allclose(max_dd.to_numpy(), expected_dd.to_numpy())
+    assert max_dd_end.tolist() == expected_end.tolist()
+    np.testing.assert_allclose(drawdowns.to_numpy(), expected.to_numpy())
+    np.testing.assert_allclose(nx.stat.MaxDD(returns).to_numpy(), expected_dd.to_numpy())
+    np.testing.assert_allclose(nx.stat.DDS(returns).to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize('column', ['a', 'b', 'c', 'd'])
+def test_dd_details_match_reference(returns, column):
+    table = returns[[column]].fillna(0)
+    details = nx.stat.dd_details(table)
+    expected = _reference_dd_details(table)
+    assert len(details) == len(expected)
+    for got, want in zip(details, expected):
+        pd.testing.assert_frame_equal(got, want)
+    worst = nx.stat.worstdd(table, 5)
+    assert worst['Started'].tolist() == [x.index[0].strftime('%Y-%m-%d') for x in expected[:5]]
+    assert worst['Ended'].tolist() == [x.index[-1].strftime('%Y-%m-%d') for x in expected[:5]]
+    np.testing.assert_allclose(worst['DrawDown'].to_numpy(), [x.iloc[:, 0].max() for x in expected[:5]])
+    assert worst['Days'].tolist() == [x.shape[0] for x in expected[:5]]
+
+
+def test_dd_episodes_columns(returns):
+    episodes = nx.stat.ddEpisodes(returns.fillna(0))
+    for i, column in enumerate(returns.columns):
+        expected = _reference_dd_details(returns[[column]].fillna(0))
+        depth = np.sort(episodes['depth'][episodes['column'] == i])[::-1]
+        np.testing.assert_allclose(depth, [x.iloc[:, 0].max() for x in expected])
+    last = episodes['column'] == 2
+    assert episodes['recovery'][last][-1] == -1
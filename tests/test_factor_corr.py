@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+import nebular_xplorer as nx
+from nebular_xplorer.utils import targetSuffix
+
+
+def _ic_reference(full_data, factor_name, target_name, lag):
+    data = full_data.to_pandas()
+    targets = data.pivot(index='date__date__', columns='code__code__', values=target_name).shift(-lag)
+    targets = targets.stack(future_stack=True).rename('lagged').reset_index()
+    data = pl.from_pandas(data[['date__date__', 'code__code__', factor_name]].merge(
+        targets, on=['date__date__', 'code__code__'], how='left'))
+    ic = data.group_by('date__date__').agg(
+        pl.corr(factor_name, 'lagged').alias('IC'),
+        pl.corr(factor_name, 'lagged', method='spearman').alias('rankIC')).to_pandas()
+    return {'IC': ic['IC'].mean(), 'rankIC': ic['rankIC'].mean(),
+            'IR': ic['IC'].mean() / ic['IC'].std(), 'rankIR': ic['rankIC'].mean() / ic['rankIC'].std()}
+
+
+@pytest.mark.parametrize('data', ['full_data', 'sparse_data'])
+def test_ic_decay_matches_reference(request, data):
+    full_data = request.getfixturevalue(data)
+    decay = nx.stat.icDecay(full_data, max_lag=3)
+    assert decay.shape[0] == 3 * 2 * 4
+    for factor_name in ['factor1', 'factor2']:
+        for target_name in ['1d_forward_return', '5d_forward_return']:
+            for lag in [0, 1, 3]:
+                row = decay.filter((pl.col('factor') == factor_name) & (pl.col('target') == target_name)
+                                   & (pl.col('lag') == lag)).row(0, named=True)
+                expected = _ic_reference(full_data, f'{factor_name}__factor__', f'{target_name}{targetSuffix}', lag)
+                for name, value in expected.items():
+                    assert row[name] == pytest.approx(value, rel=1e-9)
+
+
+def _corr_reference(full_data, method):
+    data = full_data.to_pandas()
+    columns = [x for x in data.columns if x.endswith('__factor__')]
+    if method == 'rank':
+        data[columns] = data.groupby('date__date__')[columns].rank()
+        method = 'pearson'
+    corrs = np.stack([day[columns].corr(method=method).to_numpy() for _, day in data.groupby('date__date__')])
+    names = [x.replace('__factor__', '') for x in columns]
+    return pd.DataFrame(np.nanmean(corrs, axis=0), index=names, columns=names)
+
+
+@pytest.mark.parametrize('method, exact, pandas_method', [
+    ('rank', False, 'rank'), ('rank', True, 'spearman'), ('pearson', False, 'pearson')])
+def test_factor_corr_matches_reference(full_data, method, exact, pandas_method):
+    missing = full_data.with_columns(
+        pl.when(pl.col('code__code__') % 4 == pl.col('date__date__') % 4).then(None)
+        .otherwise(pl.col('factor2__factor__')).alias('factor2__factor__'))
+    for data in [full_data.drop_nulls(), missing]:
+        pd.testing.assert_frame_equal(nx.stat.factorCorr(data, method=method, exact=exact),
+                                      _corr_reference(data, pandas_method), rtol=1e-10)
+    with pytest.raises(ValueError):
+        nx.stat.factorCorr(full_data, method='kendall')
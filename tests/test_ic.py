@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+import nebular_xplorer as nx
+from nebular_xplorer.stat import _maskedRank, _plainRank, _rankIndex
+from nebular_xplorer.utils import targetSuffix
+
+
+def _reference(full_data, factor_name):
+    _, target_names = nx.utils.check_full_data(full_data)
+    dateName, _ = nx.utils.get_key_names(full_data)
+    ic_data = full_data.group_by(dateName).agg(
+        [pl.corr(factor_name, x).alias(f"IC_{x.replace(targetSuffix, '')}") for x in target_names] +
+        [pl.corr(factor_name, x, method='spearman').alias(f"rankIC_{x.replace(targetSuffix, '')}")
+         for x in target_names])
+    ic_data = ic_data.to_pandas().set_index(dateName)
+    ic_data.index = pd.to_datetime(ic_data.index, format='%Y%m%d')
+    return ic_data.sort_index()
+
+
+@pytest.mark.parametrize('data', ['full_data', 'sparse_data'])
+def test_metrics_match_reference(request, data):
+    full_data = request.getfixturevalue(data)
+    for factor_name in ['factor1__factor__', 'factor2__factor__']:
+        factor_metrics = nx.stat.metrics(full_data, factor_name)
+        expected = _reference(full_data, factor_name)
+        pd.testing.assert_frame_equal(factor_metrics, expected[factor_metrics.columns],
+                                      check_names=False, check_freq=False, rtol=1e-10)
+
+
+def test_summary_metrics_match_reference(sparse_data):
+    summary = nx.stat.summaryMetrics(nx.stat.metrics(sparse_data, 'factor3__factor__'))
+    expected = nx.stat.summaryMetrics(_reference(sparse_data, 'factor3__factor__'))
+    pd.testing.assert_frame_equal(summary, expected)
+
+
+def test_ic_matrix_matches_metrics(sparse_data):
+    ic_matrix = nx.stat.icMatrix(sparse_data)
+    assert ic_matrix.shape[0] == 40 * 3 * 2
+    for factor_name in ['factor1', 'factor3']:
+        factor_metrics = nx.stat.metrics(sparse_data, factor_name)
+        rows = ic_matrix.filter((pl.col('factor') == factor_name) & (pl.col('target') == '5d_forward_return'))
+        np.testing.assert_allclose(rows['IC'].to_numpy(), factor_metrics['IC_5d_forward_return'].to_numpy())
+        np.testing.assert_allclose(rows['rankIC'].to_numpy(), factor_metrics['rankIC_5d_forward_return'].to_numpy())
+
+
+def test_masked_rank_ties():
+    x = np.array([[3.0, 1.0, 3.0, np.nan, 2.0, 1.0, 2.5]])
+    valid = np.array([[True, True, True, False, True, True, False]])
+    np.testing.assert_array_equal(_maskedRank(_rankIndex(x), valid)[0], [4.5, 1.5, 4.5, np.nan, 3.0, 1.5, np.nan])
+    np.testing.assert_array_equal(_plainRank(_rankIndex(x), ~np.isnan(x))[0], [5.5, 1.5, 5.5, np.nan, 3.0, 1.5, 4.0])
+    x = np.array([[3.0, 1.0, 3.0, np.nan, 2.0, 1.0, 2.5], [0.3, 0.1, 0.7, 0.2, np.nan, 0.5, 0.4]])
+    valid = np.array([[True, True, False, False, True, True, True], [True, False, True, True, True, True, True]])
+    expected = pd.DataFrame(np.where(valid & ~np.isnan(x), x, np.nan).T).rank().to_numpy().T
+    np.testing.assert_array_equal(_maskedRank(_rankIndex(x), valid & ~np.isnan(x)), expected)
+    np.testing.assert_array_equal(_plainRank(_rankIndex(x), ~np.isnan(x)), pd.DataFrame(x.T).rank().to_numpy().T)
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_time_budget():
+    elapsed = _run(
+        "import json, time; start = time.perf_counter(); import nebular_xplorer; "
+        "print(json.dumps(time.perf_counter() - start))")
+    assert elapsed < 0.5
+
+
+def test_compute_modules_skip_plotting_stack():
+    loaded = _run(
+        "import json, sys; import nebular_xplorer as nx; nx.utils; nx.stat; nx.rolling; nx.cache; nx.calendar; "
+        "nx.tracker; nx.preprocess; nx.downsample; "
+        "print(json.dumps([x for x in ['matplotlib', 'seaborn', 'tabulate'] if x in sys.modules]))")
+    assert loaded == []
+
+
+def test_compute_pipeline_skips_plotting_stack():
+    loaded = _run(
+        "import json, sys; import nebular_xplorer as nx; from benchmarks import synthetic\n"
+        "factors, targets, benchmarks = synthetic.generate(n_codes=30, n_days=30, n_factors=2, seed=3)\n"
+        "full_data = nx.utils.prepare(factors, targets)\n"
+        "return_table = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', benchmarks, n_top=[5])\n"
+        "nx.utils.getReturnTables(full_data, n_groups=[5], n_top=[5]); nx.utils.getTurnover(full_data, 'factor1')\n"
+        "factor_metrics = nx.stat.metrics(full_data)\n"
+        "nx.stat.summaryMetrics(factor_metrics); nx.stat.getPortStat(return_table); nx.stat.worstdd(return_table, 3)\n"
+        "nx.stat.icMatrix(full_data); nx.stat.icDecay(full_data, max_lag=2); nx.stat.factorCorr(full_data)\n"
+        "print(json.dumps([x for x in ['matplotlib', 'seaborn', 'tabulate'] if x in sys.modules]))")
+    assert loaded == []
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+import nebular_xplorer as nx
+
+
+def test_compact_layout(full_data):
+    compact = nx.utils.compactLayout(full_data.sample(fraction=1.0, shuffle=True, seed=3))
+    assert compact['date__date__'].dtype == pl.Int32 and compact['code__code__'].dtype == pl.Int32
+    assert all(compact[x].dtype == pl.Float32 for x in sum(nx.utils.check_full_data(compact), []))
+    assert compact['date__date__'].is_sorted() and compact['date__date__'].flags['SORTED_ASC']
+    assert compact.estimated_size() < full_data.estimated_size()
+    expected = full_data.sort('date__date__', 'code__code__')
+    assert_frame_equal(compact, expected, check_dtypes=False, rtol=1e-6)
+    strings = nx.utils.compactLayout(full_data.with_columns(pl.col('code__code__').cast(pl.String)))
+    assert strings['code__code__'].dtype == pl.Categorical
+
+
+def test_date_offsets_and_slices(full_data):
+    compact = nx.utils.compactLayout(full_data)
+    dates, bounds = nx.utils.dateOffsets(compact)
+    assert dates.tolist() == sorted(full_data['date__date__'].unique().to_list())
+    assert bounds[0] == 0 and bounds[-1] == compact.shape[0]
+    offsets = (dates, bounds)
+    for date in dates[[0, 7, -1]]:
+        day = nx.utils.dateSlice(compact, date, offsets)
+        assert_frame_equal(day, compact.filter(pl.col('date__date__') == date))
+    assert nx.utils.dateSlice(compact, 19990101).is_empty()
+    with pytest.raises(ValueError):
+        nx.utils.dateOffsets(full_data.sort('code__code__'))
+
+
+def test_ipc_round_trip(full_data, tmp_path):
+    compact = nx.utils.compactLayout(full_data)
+    nx.utils.saveFullData(compact.lazy(), tmp_path / 'full_data.arrow')
+    loaded = nx.utils.loadFullData(tmp_path / 'full_data.arrow')
+    assert_frame_equal(loaded, compact)
+    assert loaded['date__date__'].flags['SORTED_ASC']
+    expected = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+    return_table = nx.utils.getReturnTable(loaded, 'factor1', '1d_forward_return', n_top=[10])
+    pd.testing.assert_index_equal(return_table.index, expected.index)
+    np.testing.assert_allclose(return_table.to_numpy(), expected.to_numpy(), rtol=1e-5, atol=1e-7)
+    pd.testing.assert_frame_equal(nx.stat.metrics(loaded, 'factor1'), nx.stat.metrics(full_data, 'factor1'),
+                                  rtol=1e-4, atol=1e-5)
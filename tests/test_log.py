@@ -0,0 +1,46 @@
+import json
+import time
+
+import numpy as np
+import polars as pl
+
+import nebular_xplorer as nx
+
+
+def test_spans_nest_and_summarize(tmp_path, full_data):
+    with nx.log.profiling(tmp_path / 'profile.trace.json') as profiler:
+        with nx.log.span('outer') as outer:
+            nx.stat.metrics(full_data, 'factor1')
+            outer.record(full_data)
+    spans = {x['name']: x for x in profiler.toJson()}
+    assert spans['outer']['rows'] == full_data.shape[0] and spans['outer']['depth'] == 0
+    assert spans['stat.icCube.corr']['depth'] > 0 and spans['outer']['mem_peak'] is None
+    summary = profiler.summary()
+    assert summary.columns.tolist() == ['calls', 'total', 'mean', 'max', 'rows', 'mem_peak', 'py_peak', 'rss']
+    trace = json.loads((tmp_path / 'profile.trace.json').read_text())
+    assert {x['name'] for x in trace['traceEvents']} == set(summary.index)
+    assert nx.log.getProfiler() is None
+
+
+def test_memory_peak_sees_native_buffers():
+    size = 25_000_000
+    with nx.log.profiling(memory=True) as profiler:
+        sampler = profiler.sampler
+        with nx.log.span('outer'):
+            with nx.log.span('native') as s:
+                data = s.record(pl.int_range(0, size, eager=True))
+            with nx.log.span('released'):
+                other = pl.int_range(0, size, eager=True)
+                time.sleep(0.05)
+                del other
+            with nx.log.span('python'):
+                values = np.ones(size // 4)
+        del data, values
+    assert not sampler.is_alive() and profiler.sampler is None
+    spans = {x['name']: x for x in profiler.toJson()}
+    assert spans['native']['mem_peak'] > 0.8 * size * 8
+    assert spans['native']['py_peak'] < 0.1 * size * 8
+    assert spans['released']['mem_peak'] > 0.8 * size * 8
+    assert spans['python']['py_peak'] >= size // 4 * 8
+    assert spans['outer']['mem_peak'] >= spans['native']['mem_peak']
+    assert spans['outer']['py_peak'] >= spans['python']['py_peak']
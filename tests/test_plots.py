@@ -0,0 +1,54 @@
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+import nebular_xplorer as nx
+
+matplotlib.use('Agg')
+
+
+@pytest.fixture(autouse=True)
+def _close():
+    yield
+    plt.close('all')
+
+
+@pytest.fixture(scope='module')
+def ic_data():
+    rng = np.random.default_rng(5)
+    index = pd.bdate_range('2020-01-01', periods=400)
+    return pd.DataFrame(rng.normal(0.02, 0.1, (400, 2)), index=index, columns=['IC_1d', 'IC_5d'])
+
+
+@pytest.mark.parametrize('max_points, n_points', [(None, 400), (50, 50)])
+def test_ic_rolling(ic_data, max_points, n_points):
+    fig = nx.plots.icRolling(ic_data, window=20, figsize=(6, 4), max_points=max_points)
+    assert tuple(fig.get_size_inches()) == (6, 4)
+    axes = fig.get_axes()
+    assert [ax.get_ylabel() for ax in axes] == ['IC', 'IR']
+    for ax in axes:
+        assert [line.get_label() for line in ax.get_lines()[1:]] == ['IC_1d', 'IC_5d']
+        assert all(n_points * 0.9 <= len(line.get_xdata()) <= n_points for line in ax.get_lines()[1:])
+
+
+def test_ic_decay(full_data):
+    ic_decay = nx.stat.icDecay(full_data, max_lag=3)
+    fig = nx.plots.icDecay(ic_decay, value='IC', figsize=(5, 3))
+    assert tuple(fig.get_size_inches()) == (5, 3)
+    ax = fig.get_axes()[0]
+    assert ax.get_title() == 'IC Decay' and ax.get_xlabel() == 'Lag'
+    assert [x.get_text() for x in ax.get_xticklabels()] == ['0', '1', '2', '3']
+    assert len(ax.get_yticklabels()) == ic_decay.select('factor', 'target').n_unique()
+
+
+def test_factor_corr(full_data):
+    factor_corr = nx.stat.factorCorr(full_data)
+    fig = nx.plots.factorCorr(factor_corr)
+    width, height = plt.rcParams['figure.figsize']
+    assert tuple(fig.get_size_inches()) == pytest.approx((width, height * 0.8))
+    ax = fig.get_axes()[0]
+    assert ax.get_title() == 'Factor Correlation'
+    assert len(ax.get_xticklabels()) == len(factor_corr) == 3
+    assert len(ax.texts) == len(factor_corr) ** 2
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+import nebular_xplorer as nx
+
+
+def _reference(return_table, annl_year=252):
+    nav_table = (return_table.fillna(0) + 1).cumprod()
+    drawdowns = 1 - nav_table / np.maximum.accumulate(nav_table)
+    arr_si = return_table.sum() / return_table.shape[0] * annl_year
+    volatility = return_table.std() * np.sqrt(annl_year)
+    stat_return = {}
+    stat_return["ARR_SI"] = arr_si
+    stat_return["ARR_CI"] = return_table.add(1).prod() ** (annl_year / return_table.shape[0]) - 1
+    stat_return["Volatility"] = volatility
+    stat_return["Sharpe"] = arr_si / volatility
+    stat_return["Calmar"] = arr_si / drawdowns.max()
+    stat_return["Win Rate"] = (return_table > 0).mean()
+    stat_return["PL Ratio"] = return_table[return_table > 0].mean() / -return_table[return_table < 0].mean()
+    stat_return['MaxDD'] = drawdowns.max()
+    stat_return['MaxDDEnd'] = drawdowns.idxmax().dt.strftime("%Y-%m-%d")
+    return pd.DataFrame(stat_return)
+
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(5)
+    index = pd.bdate_range('2021-01-01', periods=250)
+    table = pd.DataFrame(rng.normal(0.0003, 0.012, (250, 3)), index=index, columns=['G10N01', 'G10N10', 'LS'])
+    table.iloc[10:15, 1] = np.nan
+    return table
+
+
+def test_port_stats_match_reference(returns):
+    stats = nx.stat.portStats(returns)
+    expected = _reference(returns)
+    pd.testing.assert_frame_equal(stats[expected.columns], expected, rtol=1e-10)
+    downside = np.sqrt((returns.clip(upper=0) ** 2).sum() / returns.shape[0]) * np.sqrt(252)
+    np.testing.assert_allclose(stats['Sortino'], expected['ARR_SI'] / downside)
+    np.testing.assert_allclose(stats['Tail Ratio'], (returns.quantile(0.95) / returns.quantile(0.05)).abs())
+    nav = (returns.fillna(0) + 1).cumprod()
+    for column in returns.columns:
+        end = pd.Timestamp(stats.loc[column, 'MaxDDEnd'])
+        assert stats.loc[column, 'MaxDDStart'] == nav.loc[:end, column].idxmax().strftime('%Y-%m-%d')
+
+
+def test_get_port_stat_rounds_and_accepts_polars(returns):
+    port_stat = nx.stat.getPortStat(returns)
+    pd.testing.assert_frame_equal(port_stat, nx.stat.portStats(returns).round(2))
+    frame = pl.from_pandas(returns.reset_index(names='date'))
+    pd.testing.assert_frame_equal(nx.stat.portStats(frame).drop(columns=['MaxDDStart', 'MaxDDEnd']),
+                                  nx.stat.portStats(returns).drop(columns=['MaxDDStart', 'MaxDDEnd']))
+    single = nx.stat.portStats(returns['LS'])
+    pd.testing.assert_frame_equal(single, nx.stat.portStats(returns[['LS']]))
+
+
+def test_port_stats_turnover(returns):
+    turnover = pd.DataFrame(0.1, index=returns.index, columns=['LS', 'G10N01'])
+    turnover.iloc[::2] = 0.3
+    stats = nx.stat.portStats(returns, turnover=turnover)
+    np.testing.assert_allclose(stats.loc[['G10N01', 'LS'], 'Turnover'], [0.2, 0.2])
+    np.testing.assert_allclose(stats.loc[['G10N01', 'LS'], 'Ann. Turnover'], [50.4, 50.4])
+    assert np.isnan(stats.loc['G10N10', 'Turnover'])
@@ -0,0 +1,65 @@
+import glob
+import os
+import tempfile
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+import nebular_xplorer as nx
+
+
+def _sorted(full_data):
+    dateName, codeName = nx.utils.get_key_names(full_data)
+    full_data = full_data.lazy().collect() if isinstance(full_data, pl.LazyFrame) else full_data
+    return full_data.sort(dateName, codeName).select(sorted(full_data.columns))
+
+
+def test_prepare_layout(raw_data, full_data):
+    factors, targets, _ = raw_data
+    assert full_data.shape[0] == targets.filter(pl.col('target_name') == '1d_forward_return').shape[0]
+    assert sorted(full_data.columns) == sorted([
+        'date__date__', 'code__code__', 'factor1__factor__', 'factor2__factor__', 'factor3__factor__',
+        '1d_forward_return__target__', '5d_forward_return__target__'])
+    value = factors.filter((pl.col('date') == factors['date'][100]) & (pl.col('code') == 7)
+                           & (pl.col('factor_name') == 'factor2'))['factor_value'][0]
+    row = full_data.filter((pl.col('date__date__') == factors['date'][100]) & (pl.col('code__code__') == 7))
+    assert row['factor2__factor__'][0] == value
+
+
+@pytest.mark.parametrize('chunk_days', [1, 7, 100])
+def test_streaming_matches_eager(raw_data, full_data, chunk_days):
+    factors, targets, _ = raw_data
+    streamed = nx.utils.prepare(factors.lazy(), targets.lazy(), chunk_days=chunk_days)
+    assert_frame_equal(_sorted(streamed), _sorted(full_data))
+
+
+def test_streaming_from_files(raw_data, full_data, tmp_path):
+    factors, targets, _ = raw_data
+    temp_dirs = glob.glob(os.path.join(tempfile.gettempdir(), 'nx-prepare-*'))
+    factors.sort('code').write_parquet(tmp_path / 'factors.parquet')
+    targets.write_parquet(tmp_path / 'targets.parquet')
+    for sink in [tmp_path / 'full_data.parquet', tmp_path / 'full_data.arrow']:
+        streamed = nx.utils.prepare(tmp_path / 'factors.parquet', str(tmp_path / 'targets.parquet'),
+                                    sink=sink, chunk_days=9)
+        assert isinstance(streamed, pl.LazyFrame)
+        assert_frame_equal(_sorted(streamed), _sorted(full_data))
+    assert glob.glob(os.path.join(tempfile.gettempdir(), 'nx-prepare-*')) == temp_dirs
+
+
+def test_streaming_compact(raw_data, full_data):
+    factors, targets, _ = raw_data
+    streamed = nx.utils.prepare(factors.lazy(), targets.lazy(), chunk_days=11, compact=True)
+    dateName, _ = nx.utils.get_key_names(streamed)
+    assert streamed[dateName].is_sorted()
+    assert_frame_equal(_sorted(streamed), _sorted(nx.utils.compactLayout(full_data)))
+
+
+def test_streaming_missing_factor_days(raw_data, full_data):
+    factors, targets, _ = raw_data
+    dates = targets['date'].unique().sort()
+    factors = factors.filter(~pl.col('date').is_in(dates[5:15].implode()) | (pl.col('factor_name') != 'factor3'))
+    streamed = nx.utils.prepare(factors.lazy(), targets.lazy(), chunk_days=4)
+    expected = nx.utils.prepare(factors, targets)
+    assert streamed.schema == expected.schema
+    assert_frame_equal(_sorted(streamed), _sorted(expected))
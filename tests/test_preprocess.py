@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+import nebular_xplorer as nx
+
+
+@pytest.fixture(scope='module')
+def exposures(full_data):
+    keys = full_data.select(pl.col('date__date__').alias('date'), pl.col('code__code__').alias('code'))
+    rng = np.random.default_rng(17)
+    size = rng.normal(size=keys.shape[0])
+    size[::97] = np.nan
+    return keys.with_columns(
+        pl.format('ind{}', pl.col('code') % 4).alias('industry'),
+        pl.Series('size', size).fill_nan(None),
+        pl.Series('beta', rng.normal(1, 0.3, keys.shape[0])))
+
+
+def _reference(full_data, exposures, factor_name, columns):
+    data = full_data.to_pandas().merge(
+        exposures.to_pandas(), left_on=['date__date__', 'code__code__'], right_on=['date', 'code'], how='left')
+    design = data[[x for x in columns if x != 'industry']].astype(float)
+    if 'industry' in columns:
+        dummies = pd.get_dummies(data['industry'], dtype=float)
+        design = pd.concat([design, dummies.where(data['industry'].notna())], axis=1)
+    else:
+        design['intercept'] = 1.0
+    residuals = pd.Series(np.nan, index=data.index)
+    for _, rows in data.groupby('date__date__').groups.items():
+        x, y = design.loc[rows].to_numpy(), data.loc[rows, factor_name].to_numpy(dtype=float)
+        valid = ~np.isnan(x).any(axis=1) & ~np.isnan(y)
+        if valid.sum() <= x.shape[1]:
+            continue
+        beta = np.linalg.lstsq(x[valid], y[valid], rcond=None)[0]
+        residuals[np.asarray(rows)[valid]] = y[valid] - x[valid] @ beta
+    return residuals.to_numpy()
+
+
+@pytest.mark.parametrize('columns', [['industry'], ['size', 'beta'], ['industry', 'size']])
+def test_neutralize_matches_lstsq(sparse_data, exposures, columns):
+    neutral = nx.preprocess.neutralize(sparse_data, exposures.select(['date', 'code'] + columns))
+    for factor_name in ['factor1', 'factor2']:
+        expected = _reference(sparse_data, exposures, f'{factor_name}__factor__', columns)
+        np.testing.assert_allclose(neutral[f'{factor_name}_n__factor__'].to_numpy(), expected,
+                                   rtol=1e-6, atol=1e-9)
+
+
+def test_neutralize_by_column_names(full_data, exposures):
+    data = full_data.with_columns(exposures['beta'].alias('beta__factor__'))
+    neutral = nx.preprocess.neutralize(data, ['beta'], factor_names=['factor1'])
+    expected = _reference(full_data, exposures, 'factor1__factor__', ['beta'])
+    np.testing.assert_allclose(neutral['factor1_n__factor__'].to_numpy(), expected, rtol=1e-6, atol=1e-9)
+
+
+def test_winsorize_and_standardize(full_data):
+    data = full_data.to_pandas()
+    groups = data.groupby('date__date__')['factor1__factor__']
+    median = groups.transform('median')
+    mad = (data['factor1__factor__'] - median).abs().groupby(data['date__date__']).transform('median') * 1.4826
+    expected = data['factor1__factor__'].clip(median - 3 * mad, median + 3 * mad)
+    winsorized = nx.preprocess.winsorize(full_data, n_mad=3)
+    np.testing.assert_allclose(winsorized['factor1_w__factor__'].to_numpy(), expected.to_numpy(), rtol=1e-12)
+    zscore = (data['factor1__factor__'] - groups.transform('mean')) / groups.transform('std')
+    standardized = nx.preprocess.standardize(full_data)
+    np.testing.assert_allclose(standardized['factor1_z__factor__'].to_numpy(), zscore.to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('columns', [['industry'], ['size'], ['industry', 'beta']])
+def test_preprocess_pipeline(full_data, exposures, columns):
+    processed = nx.preprocess.preprocess(full_data, n_mad=5, exposures=exposures.select(['date', 'code'] + columns))
+    standardized = nx.preprocess.standardize(
+        nx.preprocess.winsorize(full_data, n_mad=5, suffix='_p'), ['factor1_p'], suffix='')
+    residuals = _reference(standardized.drop('factor1__factor__'), exposures, 'factor1_p__factor__', columns)
+    residuals = pd.Series(residuals).groupby(full_data['date__date__'].to_numpy())
+    expected = (residuals.transform(lambda x: x) - residuals.transform('mean')) / residuals.transform('std')
+    np.testing.assert_allclose(processed['factor1_p__factor__'].to_numpy(), expected.to_numpy(), rtol=1e-6, atol=1e-9)
+
+
+@pytest.mark.parametrize('columns', [['industry'], ['industry', 'size']])
+def test_neutralize_heavy_gaps(full_data, exposures, columns):
+    data = full_data.with_columns(
+        pl.when(pl.col('code__code__') % 5 < 3).then(None).otherwise(pl.col('factor2__factor__'))
+        .alias('factor2__factor__'))
+    neutral = nx.preprocess.neutralize(data, exposures.select(['date', 'code'] + columns))
+    for factor_name in ['factor1', 'factor2']:
+        expected = _reference(data, exposures, f'{factor_name}__factor__', columns)
+        np.testing.assert_allclose(neutral[f'{factor_name}_n__factor__'].to_numpy(), expected,
+                                   rtol=1e-6, atol=1e-9)
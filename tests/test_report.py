@@ -0,0 +1,73 @@
+import base64
+import json
+from html import unescape
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import nebular_xplorer as nx
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / 'template.html'
+    path.write_text('<p>{{fig1}}</p><p>{{fig2}}</p><p>{{fig3}}</p>')
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(11)
+    index = pd.bdate_range('2022-01-03', periods=80)
+    return pd.DataFrame(rng.normal(0, 0.01, (80, 2)), index=index, columns=['G10N01', 'G10N10'])
+
+
+def test_add_figures_renders_in_pool(template, returns):
+    html = nx.report.HtmlTpl(template)
+    html.addFigures({
+        '{{fig1}}': (nx.plots.portRolling, (returns,), {'window': 20}),
+        '{{fig2}}': (nx.plots.snapshot, (returns,)),
+    }, dpi=20, max_workers=2)
+    html.addFigures({'{{fig3}}': (nx.plots.portRolling, (returns, 10))}, dpi=20, format='svg', max_points=30)
+    page = html.html
+    for slot in ['{{fig1}}', '{{fig2}}', '{{fig3}}']:
+        assert slot not in page
+    images = page.split('<img src="data:image/png;base64,')[1:]
+    assert len(images) == 2
+    for image in images:
+        assert base64.b64decode(image.split('"')[0]).startswith(b'\x89PNG')
+    assert page.split('</p><p>')[2].startswith('<svg')
+
+
+def test_add_figure_snapshots_buffer(template, returns, tmp_path):
+    buf = nx.report.figureBuffer(nx.plots.snapshot(returns), dpi=20)
+    png = buf.getvalue()
+    html = nx.report.HtmlTpl(template)
+    html.addFigure(buf, '{{fig1}}')
+    html.addFigure(lambda: nx.report.figureBuffer(nx.plots.snapshot(returns), dpi=20), '{{fig2}}')
+    html.addFigure(png, '{{fig3}}')
+    buf.close()
+    html.save(tmp_path / 'report.html')
+    images = (tmp_path / 'report.html').read_text().split('<img src="data:image/png;base64,')[1:]
+    assert len(images) == 3
+    assert base64.b64decode(images[0].split('"')[0]) == png == base64.b64decode(images[2].split('"')[0])
+
+
+def test_add_chart_embeds_valid_json(template):
+    index = pd.bdate_range('2020-01-01', periods=500)
+    data = pd.DataFrame({'<b onmouseover="x">nav</b>': np.linspace(1, 2, 500), 'spread': np.sin(np.arange(500.0))},
+                        index=index)
+    data.iloc[7, 1], data.iloc[9, 1] = np.inf, np.nan
+    html = nx.report.HtmlTpl(template)
+    html.addChart(data, '{{fig1}}', max_points=50)
+    html.addChart(data['spread'], '{{fig2}}', max_points=None)
+    page = html.html
+    assert page.count('<script>') == 1 and 'textContent' in page
+    charts = [json.loads(unescape(x.split("'")[0])) for x in page.split("data-chart='")[1:]]
+    assert [s['name'] for s in charts[0]['series']] == list(data.columns)
+    assert [len(s['x']) for s in charts[0]['series']] == [len(s['y']) for s in charts[0]['series']]
+    assert all(len(s['x']) <= 102 for s in charts[0]['series'])
+    assert len(charts[1]['series'][0]['y']) == 499
+    assert charts[1]['series'][0]['y'][7] is None and charts[1]['series'][0]['x'][9] == 10
+    assert (charts[0]['length'], charts[0]['start'], charts[0]['end']) == (500, '2020-01-01', '2021-11-30')
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+
+import nebular_xplorer as nx
+from nebular_xplorer.utils import factorSuffix, targetSuffix
+
+
+def _reference(full_data, factor_name, target_name, n_groups, n_top):
+    dateName, _ = nx.utils.get_key_names(full_data)
+    factor_name, target_name = factor_name + factorSuffix, target_name + targetSuffix
+    labels = [f'G{n_groups}N{str(x).zfill(2)}' for x in range(1, n_groups + 1)]
+    data = full_data.select(dateName, factor_name, target_name).with_columns(
+        pl.col(factor_name).qcut(n_groups, labels=labels, allow_duplicates=True).over(dateName).alias('group'),
+        pl.col(factor_name).rank().over(dateName).alias('rank'))
+    group_data = data.group_by('group', dateName).agg(pl.col(target_name).mean()).drop_nulls('group').pivot(
+        on='group', index=dateName, sort_columns=True)
+    ls_data = data.group_by(dateName).agg(
+        [pl.col(target_name).filter(pl.col('rank') >= pl.col('rank').count() - n).mean().alias(f'l_{n}')
+         for n in n_top] +
+        [pl.col(target_name).filter(pl.col('rank') < n).mean().alias(f's_{n}') for n in n_top])
+    table = ls_data.join(group_data, on=dateName).to_pandas().set_index(dateName).sort_index()
+    table.index = pd.to_datetime(table.index, format='%Y%m%d')
+    return table
+
+
+def test_return_table_matches_reference(full_data):
+    return_table = nx.utils.getReturnTable(full_data, 'factor2', '5d_forward_return', n_groups=5, n_top=[5, 20])
+    expected = _reference(full_data, 'factor2', '5d_forward_return', 5, [5, 20])
+    assert return_table.columns.tolist() == expected.columns.tolist()
+    assert (return_table.iloc[0] == 0).all()
+    pd.testing.assert_frame_equal(return_table.iloc[1:], expected, check_names=False, check_freq=False)
+
+
+def test_return_table_benchmarks(full_data, benchmarks):
+    return_table = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', benchmarks)
+    assert ['bm1__benchmark__', 'bm2__benchmark__'] == return_table.columns[-2:].tolist()
+    expected = benchmarks.filter(pl.col('name') == 'bm1').sort('date')['return_value'].to_numpy()
+    np.testing.assert_allclose(return_table['bm1__benchmark__'].iloc[1:].to_numpy(), expected)
+
+
+def test_return_tables_batch_matches_single(full_data):
+    tables = nx.utils.getReturnTables(full_data, n_groups=[3, 5], n_top=[10])
+    dateName, _ = nx.utils.get_key_names(full_data)
+    assert set(tables['factor'].unique()) == {'factor1', 'factor2', 'factor3'}
+    assert set(tables['target'].unique()) == {'1d_forward_return', '5d_forward_return'}
+    for factor_name in ['factor1', 'factor3']:
+        for n_groups in [3, 5]:
+            expected = _reference(full_data, factor_name, '1d_forward_return', n_groups, [10])
+            for portfolio in expected.columns:
+                values = tables.filter(
+                    (pl.col('factor') == factor_name) & (pl.col('target') == '1d_forward_return')
+                    & (pl.col('portfolio') == portfolio)).sort(dateName)['return'].to_numpy()
+                np.testing.assert_allclose(values, expected[portfolio].to_numpy())
+
+
+def test_return_tables_ties_and_gaps(sparse_data):
+    dateName, _ = nx.utils.get_key_names(sparse_data)
+    data = sparse_data.with_columns(
+        pl.col('factor1__factor__').round(0),
+        pl.when(pl.col(dateName) == pl.col(dateName).min()).then(None)
+        .otherwise(pl.col('factor2__factor__')).alias('factor2__factor__'))
+    tables = nx.utils.getReturnTables(data, n_groups=[1, 7], n_top=[5, 100])
+    assert tables.columns == ['factor', 'target', 'portfolio', dateName, 'return']
+    assert tables.sort('factor', 'target', 'portfolio', dateName).equals(tables)
+    for factor_name in ['factor1', 'factor2']:
+        wide = tables.filter((pl.col('factor') == factor_name) & (pl.col('target') == '5d_forward_return')).pivot(
+            on='portfolio', index=dateName, values='return').to_pandas().set_index(dateName)
+        wide.index = pd.to_datetime(wide.index, format='%Y%m%d')
+        for n_groups in [1, 7]:
+            expected = _reference(data, factor_name, '5d_forward_return', n_groups, [5, 100])
+            pd.testing.assert_frame_equal(wide.reindex(index=expected.index, columns=expected.columns), expected,
+                                          check_names=False, check_freq=False)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import nebular_xplorer as nx
+
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range('2020-01-01', periods=120)
+    table = pd.DataFrame(rng.normal(0.0005, 0.02, (120, 3)), index=index, columns=['a', 'b', 'c'])
+    table.iloc[30:34, 1] = np.nan
+    return table
+
+
+def _brute_max_dd(nav, window):
+    expected = np.empty_like(nav)
+    for t in range(nav.shape[0]):
+        part = nav[max(0, t - window + 1):t + 1]
+        expected[t] = (1 - part / np.maximum.accumulate(part, axis=0)).max(axis=0)
+    return expected
+
+
+@pytest.mark.parametrize('window', [1, 5, 20, 37, 120, None])
+def test_rolling_max_dd_matches_brute_force(returns, window):
+    nav = (1 + returns.fillna(0)).cumprod().to_numpy()
+    max_dd = nx.rolling.rollingMaxDD(returns, window)
+    np.testing.assert_allclose(max_dd.to_numpy(), _brute_max_dd(nav, window or nav.shape[0]), atol=1e-12)
+    assert (max_dd.to_numpy() >= nx.rolling.rollingDrawdown(returns, window).to_numpy() - 1e-12).all()
+
+
+@pytest.mark.parametrize('window', [5, 20, 120, None])
+def test_rolling_drawdown_matches_pandas(returns, window):
+    nav = (1 + returns.fillna(0)).cumprod()
+    peak = nav.expanding().max() if window is None else nav.rolling(window, min_periods=1).max()
+    pd.testing.assert_frame_equal(nx.rolling.rollingDrawdown(returns, window), 1 - nav / peak, check_freq=False)
+
+
+@pytest.mark.parametrize('window', [10, 60])
+def test_rolling_moments_match_pandas(returns, window):
+    rolling = returns.rolling(window)
+    pd.testing.assert_frame_equal(nx.rolling.rollingIC(returns, window), rolling.mean(), check_freq=False)
+    pd.testing.assert_frame_equal(nx.rolling.rollingIR(returns, window), rolling.mean() / rolling.std(),
+                                  check_freq=False)
+    pd.testing.assert_frame_equal(nx.rolling.rollingVolatility(returns, window), rolling.std() * np.sqrt(252),
+                                  check_freq=False)
+    pd.testing.assert_frame_equal(nx.rolling.rollingSharpe(returns, window, min_periods=5),
+                                  returns.rolling(window, min_periods=5).mean() /
+                                  returns.rolling(window, min_periods=5).std() * np.sqrt(252), check_freq=False)
+    pd.testing.assert_frame_equal(nx.rolling.rollingIC(returns, None), returns.expanding(2).mean(), check_freq=False)
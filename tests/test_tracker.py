@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+import nebular_xplorer as nx
+
+
+def _tracker():
+    return nx.tracker.FactorTracker('factor1', '1d_forward_return', n_groups=10, n_top=[10])
+
+
+@pytest.mark.parametrize('stride', [1, 5])
+def test_tracker_matches_batch(full_data, stride):
+    dates = full_data['date__date__'].unique().sort()
+    full_data = full_data.filter(pl.col('date__date__').is_in(dates.gather_every(stride).implode()))
+    tracker = _tracker()
+    daily = tracker.update(full_data)
+    return_table = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+    assert pd.Timestamp(str(tracker.lag_date)) == return_table.index[0]
+    expected = nx.stat.portStats(return_table)
+    port_stat = tracker.portStat()
+    columns = ['ARR_SI', 'ARR_CI', 'Volatility', 'Sharpe', 'Calmar', 'Win Rate', 'PL Ratio', 'Sortino',
+               'MaxDD', 'MaxDDStart', 'MaxDDEnd']
+    pd.testing.assert_frame_equal(port_stat[columns], expected.loc[port_stat.index, columns], rtol=1e-10)
+    np.testing.assert_allclose(daily[port_stat.index].to_numpy(), return_table[port_stat.index].iloc[1:].to_numpy())
+    pd.testing.assert_frame_equal(tracker.summaryMetrics(),
+                                  nx.stat.summaryMetrics(nx.stat.metrics(full_data, 'factor1')))
+
+
+def test_tracker_incremental(full_data, tmp_path):
+    dates = full_data['date__date__'].unique().sort()
+    tracker = _tracker()
+    tracker.update(full_data.filter(pl.col('date__date__') <= dates[19]))
+    tracker.save(tmp_path / 'factor1.npz')
+    tracker = nx.tracker.FactorTracker.load(tmp_path / 'factor1.npz')
+    daily = tracker.update(full_data.sample(fraction=1.0, shuffle=True, seed=2))
+    assert len(daily) == 20
+    expected = _tracker()
+    expected.update(full_data)
+    pd.testing.assert_frame_equal(tracker.portStat(), expected.portStat(), rtol=1e-10)
+    pd.testing.assert_frame_equal(tracker.summaryMetrics(), expected.summaryMetrics())
+    assert tracker.update(full_data).empty
+
+
+def test_tracker_daily_frames_bypass_cache(raw_data, full_data, tmp_path):
+    factors, targets, _ = raw_data
+    date = full_data['date__date__'].max()
+    expected = _tracker()
+    expected.update(full_data)
+    tracker = _tracker()
+    with nx.cache.caching(tmp_path):
+        tracker.update(full_data.filter(pl.col('date__date__') < date))
+        tracker.update(factors.filter(pl.col('date') == date), targets.filter(pl.col('date') == date))
+    assert os.listdir(tmp_path) == []
+    pd.testing.assert_frame_equal(tracker.portStat(), expected.portStat(), rtol=1e-10)
+
+
+def test_tracker_daily_frames_key_name(raw_data, full_data):
+    factors, targets, _ = raw_data
+    names = {'date': 'trade_date', 'code': 'symbol'}
+    expected = _tracker()
+    expected.update(full_data)
+    tracker = _tracker()
+    tracker.update(factors.rename(names), targets.rename(names), key_name=['trade_date', 'symbol'])
+    pd.testing.assert_frame_equal(tracker.portStat(), expected.portStat(), rtol=1e-10)
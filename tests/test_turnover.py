@@ -0,0 +1,81 @@
+import matplotlib
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+
+import nebular_xplorer as nx
+from nebular_xplorer.utils import _group_expr, _group_labels
+
+matplotlib.use('Agg')
+
+
+def _weights(members):
+    return {} if not members else {x: 1 / len(members) for x in members}
+
+
+def _reference(full_data, factor_name, n_groups, n_top):
+    factor_name = f'{factor_name}__factor__'
+    data = full_data.with_columns(_group_expr(factor_name, n_groups, 'date__date__').alias('group')).to_pandas()
+    data['rank'] = data.groupby('date__date__')[factor_name].rank()
+    data['count'] = data.groupby('date__date__')[factor_name].transform('count')
+    portfolios = {}
+    for date, day in data.groupby('date__date__'):
+        day = day.dropna(subset=[factor_name])
+        members = {x: set(day['code__code__'][day['group'] == x]) for x in _group_labels(n_groups)}
+        for n in n_top:
+            members[f'l_{n}'] = set(day['code__code__'][day['rank'] >= day['count'] - n])
+            members[f's_{n}'] = set(day['code__code__'][day['rank'] < n])
+        portfolios[date] = members
+    dates = sorted(portfolios)
+    turnover = {}
+    for prev, date in zip(dates[:-1], dates[1:]):
+        turnover[date] = {}
+        for name, members in portfolios[date].items():
+            old, new = _weights(portfolios[prev][name]), _weights(members)
+            if old and new:
+                turnover[date][name] = 0.5 * sum(abs(new.get(x, 0) - old.get(x, 0)) for x in set(old) | set(new))
+    turnover = pd.DataFrame.from_dict(turnover, orient='index')
+    turnover.index = pd.to_datetime(turnover.index.astype(str), format='%Y%m%d')
+    return turnover
+
+
+@pytest.mark.parametrize('data', ['full_data', 'sparse_data'])
+def test_turnover_matches_reference(request, data):
+    full_data = request.getfixturevalue(data)
+    full_data = full_data.with_columns(
+        pl.when(pl.col('code__code__') % 5 == pl.col('date__date__') % 5).then(None)
+        .otherwise(pl.col('factor2__factor__')).alias('factor2__factor__'))
+    for factor_name in ['factor1', 'factor2']:
+        turnover = nx.utils.getTurnover(full_data, factor_name, n_groups=5, n_top=[10])
+        assert turnover.columns.tolist()[:2] == ['l_10', 's_10']
+        assert turnover.iloc[0].isna().all()
+        expected = _reference(full_data, factor_name, 5, [10])
+        pd.testing.assert_frame_equal(turnover.iloc[1:], expected[turnover.columns],
+                                      check_names=False, check_freq=False)
+
+
+def test_net_return_table(full_data):
+    return_table = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+    turnover = nx.utils.getTurnover(full_data, 'factor1', n_top=[10])
+    net_table = nx.utils.netReturnTable(return_table, turnover, cost=0.002)
+    pd.testing.assert_frame_equal(net_table, return_table - 0.002 * turnover.reindex(return_table.index).fillna(0))
+    net_table = nx.utils.netReturnTable(return_table, turnover, cost=lambda t: t ** 2)
+    pd.testing.assert_frame_equal(net_table, return_table - turnover.reindex(return_table.index).fillna(0) ** 2)
+    port_stat = nx.stat.portStats(return_table, turnover=turnover)
+    np.testing.assert_allclose(port_stat['Turnover'], turnover[port_stat.index].mean())
+
+
+def test_factor_report_turnover(full_data):
+    html, summary = nx.batch.factorReport(full_data, 'factor1', n_top=[10], dpi=20, cost=0.01)
+    return_table = nx.utils.getReturnTable(full_data, 'factor1', '1d_forward_return', n_top=[10])
+    turnover = nx.utils.getTurnover(full_data, 'factor1', n_top=[10])
+    spread_turnover = turnover['G10N10'] + turnover['G10N01']
+    spread = return_table['G10N10'] - return_table['G10N01']
+    net = spread - 0.01 * spread_turnover.reindex(spread.index).fillna(0)
+    assert summary['Turnover'] == pytest.approx(spread_turnover.mean())
+    assert summary['Net ARR'] == pytest.approx(net.mean() * 252)
+    assert summary['Net ARR'] < summary['ARR']
+    assert list(summary) == nx.batch.summaryColumns[1:-1]
+    page = html.html
+    assert page.count('<img') == 6 and 'Ann. Turnover' in page and 'Net Sharpe' in page